@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compares the throughput of passing small messages to .NET one call 
+at a time against passing them through DotNetSession.call_batch.
+
+Requires the example C# project to be compiled first.
+"""
+
+import argparse
+import os.path
+import sys
+import time
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(this_dir))
+
+from dotnetpy import DotNetSession
+
+example_dir = os.path.join(os.path.dirname(this_dir), "example")
+assembly_path = os.path.join(example_dir, "CSharpExample/bin/Debug/CSharpExample.dll")
+config_path = os.path.join(example_dir, "DotNetRuntimeConfig.json")
+type_name = "CSharpExample.LibraryFunctions, CSharpExample"
+
+def run_per_item(entry_point, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        entry_point(payload)
+    return time.perf_counter() - start
+
+def run_batched(session: DotNetSession, entry_point, payloads, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(payloads), batch_size):
+        session.call_batch(entry_point, payloads[i:i + batch_size])
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched versus per-item calls into .NET")
+    parser.add_argument("--count", "-n", type=int, default=200000,
+                        help="Number of messages to send")
+    parser.add_argument("--size", "-s", type=int, default=64,
+                        help="Size of each message in bytes")
+    parser.add_argument("--batch-size", "-b", type=int, nargs='*', 
+                        default=[ 16, 256, 4096 ],
+                        help="Number of messages per batch")
+    args = parser.parse_args()
+
+    if not os.path.exists(assembly_path):
+        print(f"{assembly_path} not found; please compile the .NET assembly first", file=sys.stderr)
+        sys.exit(2)
+
+    session = DotNetSession(config_path=config_path)
+    per_item = session.get_entry_point(assembly_path, type_name, "ProcessMessage")
+    batched = session.get_entry_point(assembly_path, type_name, "ProcessBatch")
+
+    payloads = [ bytes([i % 256]) * args.size for i in range(args.count) ]
+
+    # Warm up JIT compilation of both paths
+    run_per_item(per_item, payloads[:1000])
+    run_batched(session, batched, payloads[:1000], 100)
+
+    elapsed = run_per_item(per_item, payloads)
+    print(f"per-item:         {args.count / elapsed:12,.0f} calls/s")
+
+    for batch_size in args.batch_size:
+        elapsed = run_batched(session, batched, payloads, batch_size)
+        print(f"batch of {batch_size:<7} {args.count / elapsed:12,.0f} calls/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Measures throughput and latency of messages streamed through a 
+DotNetChannel to the echoing .NET component in the example C# project,
+under sustained load.
+
+Requires the example C# project to be compiled first.
+"""
+
+import argparse
+import os.path
+import statistics
+import struct
+import sys
+import threading
+import time
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(this_dir))
+
+from dotnetpy import DotNetSession, DotNetChannel
+
+example_dir = os.path.join(os.path.dirname(this_dir), "example")
+assembly_path = os.path.join(example_dir, "CSharpExample/bin/Debug/CSharpExample.dll")
+config_path = os.path.join(example_dir, "DotNetRuntimeConfig.json")
+type_name = "CSharpExample.ChannelEcho, CSharpExample"
+
+timestamp = struct.Struct('<q')
+
+def connect(session: DotNetSession, capacity: int) -> DotNetChannel:
+    channel = DotNetChannel(capacity)
+    channel.connect(session.get_entry_point(assembly_path, type_name, "Start"))
+    return channel
+
+def run_throughput(session: DotNetSession, count: int, size: int, capacity: int):
+    """
+    Send messages as fast as possible from one thread while receiving
+    the echoes on another, reporting the round-trip latency of each.
+    """
+    channel = connect(session, capacity)
+    padding = bytes(size - timestamp.size)
+
+    def produce():
+        for _ in range(count):
+            channel.send(timestamp.pack(time.perf_counter_ns()) + padding)
+
+    producer = threading.Thread(target=produce)
+    start = time.perf_counter()
+    producer.start()
+
+    latencies = []
+    for _ in range(count):
+        message = channel.receive()
+        latencies.append(time.perf_counter_ns() - timestamp.unpack_from(message)[0])
+
+    elapsed = time.perf_counter() - start
+    producer.join()
+    channel.close()
+    return elapsed, latencies
+
+def run_ping_pong(session: DotNetSession, count: int, size: int, capacity: int):
+    """
+    Send one message at a time, waiting for its echo before the next.
+    """
+    channel = connect(session, capacity)
+    message = bytes(size)
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        channel.send(message)
+        channel.receive()
+        latencies.append(time.perf_counter_ns() - start)
+    channel.close()
+    return latencies
+
+def percentile(sorted_values, fraction: float):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def report(label: str, latencies):
+    latencies = sorted(latencies)
+    print(f"{label}: median {statistics.median(latencies) / 1000:,.1f} us, "
+          f"p99 {percentile(latencies, 0.99) / 1000:,.1f} us, "
+          f"p99.9 {percentile(latencies, 0.999) / 1000:,.1f} us, "
+          f"max {latencies[-1] / 1000:,.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DotNetChannel under sustained load")
+    parser.add_argument("--count", "-n", type=int, default=200000,
+                        help="Number of messages to send")
+    parser.add_argument("--size", "-s", type=int, default=64,
+                        help="Size of each message in bytes (at least 8)")
+    parser.add_argument("--capacity", "-c", type=int, default=1 << 20,
+                        help="Capacity of each ring in bytes")
+    args = parser.parse_args()
+
+    if not os.path.exists(assembly_path):
+        print(f"{assembly_path} not found; please compile the .NET assembly first", file=sys.stderr)
+        sys.exit(2)
+
+    session = DotNetSession(config_path=config_path)
+
+    # Warm up JIT compilation of the .NET side
+    run_ping_pong(session, 1000, args.size, args.capacity)
+
+    elapsed, latencies = run_throughput(session, args.count, args.size, args.capacity)
+    print(f"streaming: {args.count / elapsed:,.0f} messages/s, "
+          f"{args.count * args.size / elapsed / 1e6:,.1f} MB/s")
+    report("streaming round trip", latencies)
+
+    latencies = run_ping_pong(session, min(args.count, 20000), args.size, args.capacity)
+    report("ping-pong round trip", latencies)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Measures the overhead that dotnetpy itself adds on the Python side:
+session initialization, run-time property access, resolution of 
+entry points, calls through delegates, and string marshalling.
+
+In "stub" mode, the benchmarks run against the stand-in for hostfxr 
+in stub/hostfxr_stub.c, compiled on the fly with the C compiler, so 
+no .NET installation is needed.  In "real" mode, they run against 
+an installed .NET run-time and the compiled example C# project.
+Each mode runs in its own process, since a process can only host 
+one run-time.
+"""
+
+import argparse
+import json
+import os
+import os.path
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(this_dir))
+
+import dotnetpy
+from dotnetpy import DotNetSession, to_tstring, from_tstring, c_tchar_p
+
+example_dir = os.path.join(os.path.dirname(this_dir), "example")
+example_assembly_path = os.path.join(example_dir, "CSharpExample/bin/Debug/CSharpExample.dll")
+example_config_path = os.path.join(example_dir, "DotNetRuntimeConfig.json")
+example_type_name = "CSharpExample.LibraryFunctions, CSharpExample"
+
+def build_stub(output_dir: str) -> str:
+    """
+    Compile the stand-in for hostfxr, returning the path to the library.
+    """
+    if sys.platform == 'win32':
+        raise NotImplementedError("Pass --stub-library with a pre-built DLL on Windows")
+
+    compiler = os.environ.get("CC") or shutil.which("cc") or shutil.which("gcc")
+    if compiler is None:
+        raise RuntimeError("No C compiler found to build the hostfxr stub")
+
+    library_path = os.path.join(output_dir, "libhostfxr_stub.so")
+    subprocess.run([ compiler, "-O2", "-shared", "-fPIC", 
+                     "-o", library_path, 
+                     os.path.join(this_dir, "stub", "hostfxr_stub.c") ],
+                   check=True)
+    return library_path
+
+class Runner():
+
+    def __init__(self, repeat: int, min_time: float):
+        self.repeat = repeat
+        self.min_time = min_time
+        self.results = []
+
+    def bench(self, name: str, fn):
+        """
+        Time ``fn``, called with no arguments, reporting the time per call.
+        """
+        # Calibrate so each round takes at least min_time
+        number = 1
+        while True:
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter_ns() - start
+            if elapsed >= self.min_time * 1e9 or number >= 1 << 24:
+                break
+            number *= 2
+
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            timings.append((time.perf_counter_ns() - start) / number)
+
+        result = { 
+            "name": name, 
+            "iterations": number, 
+            "repeat": self.repeat,
+            "min_ns": min(timings), 
+            "median_ns": statistics.median(timings), 
+            "mean_ns": statistics.mean(timings),
+        }
+        self.results.append(result)
+        print(f"{name:52} {result['median_ns']:12,.0f} ns  (min {result['min_ns']:,.0f})", 
+              file=sys.stderr)
+
+def run_benchmarks(runner: Runner, session_args: dict, assembly_path: str):
+    session = DotNetSession(**session_args)
+
+    # Run-time properties can only be set before the run-time starts
+    keys = [ f"Bench.Property{i}" for i in range(16) ]
+    runner.bench("set_runtime_property_value", 
+                 lambda: session.set_runtime_property_value("Bench.Property", "value"))
+    runner.bench("set_runtime_properties[16]", 
+                 lambda: session.set_runtime_properties({ k: "value" for k in keys }))
+    runner.bench("runtime_properties (uncached)", 
+                 lambda: (session.host_context.invalidate_properties(), 
+                          session.runtime_properties))
+    runner.bench("runtime_properties (cached)", 
+                 lambda: session.runtime_properties)
+    runner.bench("get_runtime_property_value", 
+                 lambda: session.get_runtime_property_value("System.GC.Server"))
+
+    def resolve():
+        return session.load_assembly_and_get_function_pointer(
+            assembly_path, example_type_name, "Noop")
+
+    # Starts the run-time, if real
+    resolve()
+    runner.bench("load_assembly_and_get_function_pointer (cached)", resolve)
+    runner.bench("load_assembly_and_get_function_pointer (uncached)",
+                 lambda: (session.entry_point_cache.invalidate(), resolve()))
+
+    counter = iter(range(1 << 62))
+    def new_session():
+        overrides = { "Bench.Session": str(next(counter)) }
+        s = DotNetSession(config_overrides=overrides, **session_args)
+        del s
+    def shared_session():
+        s = DotNetSession(**session_args)
+        del s
+    runner.bench("DotNetSession() (new host context)", new_session)
+    runner.bench("DotNetSession() (shared host context)", shared_session)
+
+    raw = resolve()
+    entry_point = session.get_entry_point(assembly_path, example_type_name, "Noop")
+    batch_entry_point = session.get_entry_point(assembly_path, example_type_name, "ProcessBatch")
+    payload = bytes(64)
+    payloads = [ payload ] * 100
+    large_payload = bytearray(1 << 20)
+    runner.bench("raw delegate call", lambda: raw(None, 0))
+    runner.bench("ComponentEntryPoint()", lambda: entry_point())
+    runner.bench("ComponentEntryPoint(bytes[64])", lambda: entry_point(payload))
+    runner.bench("ComponentEntryPoint(bytearray[1M])", lambda: entry_point(large_payload))
+    runner.bench("call_batch(100 x bytes[64])", 
+                 lambda: session.call_batch(batch_entry_point, payloads))
+
+    path = os.path.join(this_dir, "some", "directory", "Assembly.dll")
+    encoded = to_tstring(path)
+    pointer = c_tchar_p(encoded)
+    runner.bench("to_tstring", lambda: to_tstring(path))
+    runner.bench("from_tstring", lambda: from_tstring(pointer))
+
+def run_mode(mode: str, args) -> dict:
+    runner = Runner(args.repeat, args.min_time)
+
+    if mode == 'stub':
+        build_dir = None
+        library_path = args.stub_library
+        if library_path is None:
+            build_dir = tempfile.mkdtemp(prefix="dotnetpy-bench-")
+            library_path = build_stub(build_dir)
+        try:
+            run_benchmarks(runner, 
+                           { "dll_path": library_path }, 
+                           os.path.join(this_dir, "Stub.dll"))
+        finally:
+            if build_dir is not None:
+                shutil.rmtree(build_dir, ignore_errors=True)
+    else:
+        if not os.path.exists(example_assembly_path):
+            raise RuntimeError(f"{example_assembly_path} not found; please compile the .NET assembly first")
+        run_benchmarks(runner, 
+                       { "config_path": example_config_path }, 
+                       example_assembly_path)
+
+    return { "mode": mode, "results": runner.results }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python-side overhead of dotnetpy")
+    parser.add_argument("--mode", "-m", choices=[ "stub", "real", "all" ], default="stub",
+                        help="Run against the hostfxr stub, a real .NET run-time, or both")
+    parser.add_argument("--output", "-o", dest='output', default=None,
+                        help="Write results as JSON to this file")
+    parser.add_argument("--stub-library", dest='stub_library', default=None,
+                        help="Pre-built hostfxr stub library, instead of compiling it")
+    parser.add_argument("--repeat", "-r", type=int, default=5,
+                        help="Number of timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="Minimum duration of each round in seconds")
+    args = parser.parse_args()
+
+    report = {
+        "dotnetpy_path": os.path.dirname(dotnetpy.__file__),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "runs": [],
+    }
+
+    if args.mode == 'all':
+        # Each mode needs a process of its own
+        for mode in [ "stub", "real" ]:
+            print(f"--- {mode} ---", file=sys.stderr)
+            command = [ sys.executable, os.path.abspath(__file__), 
+                        "--mode", mode, 
+                        "--repeat", str(args.repeat),
+                        "--min-time", str(args.min_time),
+                        "--output", "-" ]
+            if args.stub_library is not None:
+                command += [ "--stub-library", args.stub_library ]
+            p = subprocess.run(command, stdout=subprocess.PIPE)
+            if p.returncode != 0:
+                print(f"{mode} benchmarks failed", file=sys.stderr)
+                continue
+            report["runs"] += json.loads(p.stdout)["runs"]
+    else:
+        report["runs"].append(run_mode(args.mode, args))
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+    elif args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+/*
+ * Stand-in for the "hostfxr" and "nethost" libraries of .NET, 
+ * exporting the same functions that dotnetpy calls, so that the 
+ * overhead added by dotnetpy can be measured without a .NET installation.
+ *
+ * Entry points resolved through the fake load_assembly_and_get_function_pointer
+ * return immediately.  "ProcessBatch" is batch-aware, following the 
+ * layout of batch_descriptor in dotnetpy.  "StreamBytes" streams data
+ * through stream_descriptor like its namesake in the example project.
+ * "Exit" ends the process with argSize as the exit code, for testing
+ * how crashes are handled.  Every other method name resolves to a 
+ * function that does nothing.
+ */
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+#ifdef _WIN32
+#include <wchar.h>
+typedef wchar_t char_t;
+#define EXPORT __declspec(dllexport)
+#define STR(s) L##s
+#define str_cmp wcscmp
+#define str_dup _wcsdup
+#else
+typedef char char_t;
+#define EXPORT __attribute__((visibility("default")))
+#define STR(s) s
+#define str_cmp strcmp
+#define str_dup strdup
+#endif
+
+#define HOST_API_BUFFER_TOO_SMALL ((int32_t)0x80008098)
+#define HOST_PROPERTY_NOT_FOUND ((int32_t)0x800080a4)
+#define INVALID_ARG_FAILURE ((int32_t)0x80008081)
+
+#define MAX_PROPERTIES 256
+
+static const char_t *property_keys[MAX_PROPERTIES];
+static const char_t *property_values[MAX_PROPERTIES];
+static size_t property_count;
+
+static int open_contexts;
+static int context_handle_storage;
+
+static void set_property(const char_t *key, const char_t *value)
+{
+    size_t i;
+    for (i = 0; i < property_count; ++i) {
+        if (str_cmp(property_keys[i], key) == 0) {
+            free((void *)property_values[i]);
+            property_values[i] = str_dup(value);
+            return;
+        }
+    }
+
+    if (property_count < MAX_PROPERTIES) {
+        property_keys[property_count] = str_dup(key);
+        property_values[property_count] = str_dup(value);
+        ++property_count;
+    }
+}
+
+static void remove_property(const char_t *key)
+{
+    size_t i;
+    for (i = 0; i < property_count; ++i) {
+        if (str_cmp(property_keys[i], key) == 0) {
+            free((void *)property_keys[i]);
+            free((void *)property_values[i]);
+            --property_count;
+            property_keys[i] = property_keys[property_count];
+            property_values[i] = property_values[property_count];
+            return;
+        }
+    }
+}
+
+EXPORT int32_t get_hostfxr_path(char_t *buffer, size_t *buffer_size, const void *parameters)
+{
+    static const char_t path[] = STR("hostfxr_stub");
+    size_t needed = sizeof(path) / sizeof(char_t);
+    (void)parameters;
+
+    if (buffer == NULL || *buffer_size < needed) {
+        *buffer_size = needed;
+        return HOST_API_BUFFER_TOO_SMALL;
+    }
+
+    memcpy(buffer, path, sizeof(path));
+    return 0;
+}
+
+EXPORT int32_t hostfxr_initialize_for_runtime_config(const char_t *runtime_config_path,
+                                                     const void *parameters,
+                                                     void **host_context_handle)
+{
+    (void)runtime_config_path;
+    (void)parameters;
+
+    if (property_count == 0)
+        set_property(STR("System.GC.Server"), STR("false"));
+
+    *host_context_handle = &context_handle_storage;
+
+    /* Success for the first context, Success_HostAlreadyInitialized afterwards */
+    return open_contexts++ == 0 ? 0 : 1;
+}
+
+EXPORT int32_t hostfxr_get_runtime_property_value(const void *host_context_handle,
+                                                  const char_t *name,
+                                                  const char_t **value)
+{
+    size_t i;
+    (void)host_context_handle;
+
+    for (i = 0; i < property_count; ++i) {
+        if (str_cmp(property_keys[i], name) == 0) {
+            *value = property_values[i];
+            return 0;
+        }
+    }
+
+    return HOST_PROPERTY_NOT_FOUND;
+}
+
+EXPORT int32_t hostfxr_set_runtime_property_value(const void *host_context_handle,
+                                                  const char_t *name,
+                                                  const char_t *value)
+{
+    (void)host_context_handle;
+    if (name == NULL)
+        return INVALID_ARG_FAILURE;
+
+    /* Like hostfxr, a null value removes the property */
+    if (value == NULL)
+        remove_property(name);
+    else
+        set_property(name, value);
+    return 0;
+}
+
+EXPORT int32_t hostfxr_get_runtime_properties(const void *host_context_handle,
+                                              size_t *count,
+                                              const char_t **keys,
+                                              const char_t **values)
+{
+    size_t i;
+    (void)host_context_handle;
+
+    /* Like hostfxr, null arrays are too small even for no properties */
+    if (*count < property_count || keys == NULL || values == NULL) {
+        *count = property_count;
+        return HOST_API_BUFFER_TOO_SMALL;
+    }
+
+    for (i = 0; i < property_count; ++i) {
+        keys[i] = property_keys[i];
+        values[i] = property_values[i];
+    }
+
+    *count = property_count;
+    return 0;
+}
+
+struct batch_descriptor {
+    int32_t count;
+    int32_t reserved;
+    const uint8_t *arena;
+    const int64_t *items;
+    int32_t *statuses;
+};
+
+static int32_t noop_entry_point(void *arg, int32_t arg_size)
+{
+    (void)arg;
+    (void)arg_size;
+    return 0;
+}
+
+static int32_t batch_entry_point(void *arg, int32_t arg_size)
+{
+    struct batch_descriptor *batch = (struct batch_descriptor *)arg;
+    int32_t i;
+
+    if (arg_size < (int32_t)sizeof(struct batch_descriptor))
+        return -1;
+
+    for (i = 0; i < batch->count; ++i)
+        batch->statuses[i] = 0;
+
+    return batch->count;
+}
+
+struct stream_descriptor {
+    int32_t (*emit)(int32_t index, int32_t length);
+    const void *request;
+    uint8_t **chunks;
+    int32_t request_size;
+    int32_t chunk_size;
+    int32_t chunk_count;
+};
+
+/* Streams the number of bytes given by the 64-bit request, 
+   the byte at each position being the position modulo 251 */
+static int32_t stream_entry_point(void *arg, int32_t arg_size)
+{
+    struct stream_descriptor *stream = (struct stream_descriptor *)arg;
+    int64_t total, position = 0;
+    int32_t chunk_index = 0;
+
+    if (arg_size < (int32_t)sizeof(struct stream_descriptor) || 
+        stream->request_size < (int32_t)sizeof(int64_t))
+        return -1;
+
+    memcpy(&total, stream->request, sizeof(total));
+    while (position < total) {
+        uint8_t *chunk = stream->chunks[chunk_index];
+        int32_t length = total - position < stream->chunk_size 
+                            ? (int32_t)(total - position) : stream->chunk_size;
+        int32_t i;
+        for (i = 0; i < length; ++i)
+            chunk[i] = (uint8_t)((position + i) % 251);
+        position += length;
+
+        chunk_index = stream->emit(chunk_index, length);
+        if (chunk_index < 0)
+            return 1;
+    }
+
+    return 0;
+}
+
+static int32_t exit_entry_point(void *arg, int32_t arg_size)
+{
+    (void)arg;
+    _Exit(arg_size);
+}
+
+static int32_t load_assembly_and_get_function_pointer(const char_t *assembly_path,
+                                                      const char_t *type_name,
+                                                      const char_t *method_name,
+                                                      const char_t *delegate_type_name,
+                                                      void *reserved,
+                                                      void **delegate)
+{
+    (void)assembly_path;
+    (void)type_name;
+    (void)delegate_type_name;
+    (void)reserved;
+
+    if (method_name == NULL)
+        return INVALID_ARG_FAILURE;
+
+    if (str_cmp(method_name, STR("ProcessBatch")) == 0)
+        *delegate = (void *)&batch_entry_point;
+    else if (str_cmp(method_name, STR("StreamBytes")) == 0)
+        *delegate = (void *)&stream_entry_point;
+    else if (str_cmp(method_name, STR("Exit")) == 0)
+        *delegate = (void *)&exit_entry_point;
+    else
+        *delegate = (void *)&noop_entry_point;
+    return 0;
+}
+
+EXPORT int32_t hostfxr_get_runtime_delegate(const void *host_context_handle,
+                                            int32_t type,
+                                            void **delegate)
+{
+    (void)host_context_handle;
+
+    /* Only hdt_load_assembly_and_get_function_pointer is supported */
+    if (type != 5)
+        return INVALID_ARG_FAILURE;
+
+    *delegate = (void *)&load_assembly_and_get_function_pointer;
+    return 0;
+}
+
+EXPORT int32_t hostfxr_close(const void *host_context_handle)
+{
+    (void)host_context_handle;
+    --open_contexts;
+    return 0;
+}
@@ -1 +1,6 @@
 from ._dotnetpy import *
+from ._executor import *
+from ._channel import *
+from ._process_pool import *
+from ._metrics import *
+from ._tracing import *
@@ -0,0 +1,367 @@
+import ctypes
+import mmap
+import os
+import select
+import struct
+import threading
+import time
+from typing import List, Optional
+
+from ._dotnetpy import DotNetHostError
+
+# Layout of the header of each ring, with the fields written by the
+# producer and by the consumer on separate cache lines
+_RING_CAPACITY_OFFSET = 0           # uint64, size of the data area
+_RING_HEAD_OFFSET = 64              # uint64, total bytes written; owned by producer
+_RING_TAIL_OFFSET = 128             # uint64, total bytes consumed; owned by consumer
+_RING_WAITING_OFFSET = 192          # int32, consumer is about to block on its signal
+_RING_CLOSED_OFFSET = 196           # int32, producer will write no more records
+_RING_HEADER_SIZE = 256
+
+# Length prefix marking that the next record starts at the beginning of the data area
+_WRAP_MARKER = 0xFFFFFFFF
+
+# Upper bound on how long to block before looking at the ring again.
+# Setting the "waiting" flag and then re-checking the ring cannot be
+# made atomic with respect to the producer from Python, so in a rare
+# race a wake-up can be missed; this bounds the resulting delay.
+_MAX_WAIT_SECONDS = 0.01
+
+_record_length = struct.Struct('<I')
+
+
+class channel_descriptor(ctypes.Structure):
+    """
+    Argument passed by ``DotNetChannel.connect`` to a .NET component
+    entry point, as ``argPtr``.
+
+    ``outbound`` and ``inbound`` point to the headers of the two rings.
+    .NET reads records from ``outbound`` and writes them to ``inbound``.
+    While its consumer waiting flag is set on ``outbound``, .NET may
+    block by polling ``outbound_wait_fd`` for readability, then reading
+    to reset it; after writing to ``inbound`` while Python's consumer
+    waiting flag is set, it writes 8 bytes to ``inbound_notify_fd``.
+    The file descriptors are -1 where not supported, in which case
+    .NET must poll the rings.
+    """
+    _fields_ = [("outbound", ctypes.c_void_p),
+                ("inbound", ctypes.c_void_p),
+                ("outbound_wait_fd", ctypes.c_int),
+                ("inbound_notify_fd", ctypes.c_int)]
+
+
+class _Signal():
+    """
+    Wakes up a thread blocked waiting on a file descriptor,
+    using eventfd on Linux and a pipe on other Unix systems.
+    """
+
+    def __init__(self):
+        if hasattr(os, 'eventfd'):
+            fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+            self.read_fd = self.write_fd = fd
+        elif os.name == 'posix':
+            self.read_fd, self.write_fd = os.pipe()
+            os.set_blocking(self.read_fd, False)
+            os.set_blocking(self.write_fd, False)
+        else:
+            self.read_fd = self.write_fd = -1
+
+    def notify(self):
+        if self.write_fd >= 0:
+            try:
+                os.write(self.write_fd, b'\x01\0\0\0\0\0\0\0')
+            except BlockingIOError:
+                # A wake-up is already pending
+                pass
+
+    def wait(self, timeout: float):
+        if self.read_fd >= 0:
+            select.select([ self.read_fd ], [], [], timeout)
+            try:
+                os.read(self.read_fd, 4096)
+            except BlockingIOError:
+                pass
+        else:
+            time.sleep(min(timeout, 0.0005))
+
+    def close(self):
+        if self.read_fd >= 0:
+            os.close(self.read_fd)
+            if self.write_fd != self.read_fd:
+                os.close(self.write_fd)
+            self.read_fd = self.write_fd = -1
+
+
+class _Ring():
+    """
+    Single-producer, single-consumer queue of length-prefixed records
+    in shared memory.
+
+    Records are a 32-bit little-endian length followed by the payload,
+    padded to a multiple of 8 bytes.  The head and tail count bytes
+    written and consumed since the start and are never wrapped;
+    the producer publishes a record by storing the new head after
+    writing the record, relying on x86/x64 not reordering stores.
+    """
+
+    def __init__(self, region: mmap.mmap, offset: int, capacity: int):
+        self._view = memoryview(region)
+        self._data_offset = offset + _RING_HEADER_SIZE
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.address = ctypes.addressof(ctypes.c_char.from_buffer(region, offset))
+
+        ctypes.c_uint64.from_buffer(region, offset + _RING_CAPACITY_OFFSET).value = capacity
+        self._head = ctypes.c_uint64.from_buffer(region, offset + _RING_HEAD_OFFSET)
+        self._tail = ctypes.c_uint64.from_buffer(region, offset + _RING_TAIL_OFFSET)
+        self._waiting = ctypes.c_int32.from_buffer(region, offset + _RING_WAITING_OFFSET)
+        self._closed = ctypes.c_int32.from_buffer(region, offset + _RING_CLOSED_OFFSET)
+
+        # Largest payload that is guaranteed to fit even after skipping
+        # the unused space at the end of the data area
+        self.max_record_size = capacity // 2 - 8
+
+    def release(self):
+        # Drop all exports of the memory so that it can be unmapped
+        del self._head, self._tail, self._waiting, self._closed
+        self._view.release()
+
+    @property
+    def is_empty(self) -> bool:
+        return self._head.value == self._tail.value
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.value != 0
+
+    def close(self):
+        self._closed.value = 1
+
+    @property
+    def consumer_waiting(self) -> bool:
+        return self._waiting.value != 0
+
+    def set_consumer_waiting(self, waiting: bool):
+        self._waiting.value = 1 if waiting else 0
+
+    def try_write(self, payload: memoryview) -> bool:
+        length = payload.nbytes
+        record_size = (4 + length + 7) & ~7
+        capacity = self.capacity
+
+        head = self._head.value
+        position = head & self._mask
+        contiguous = capacity - position
+        needed = record_size if record_size <= contiguous else contiguous + record_size
+        if capacity - (head - self._tail.value) < needed:
+            return False
+
+        view = self._view
+        start = self._data_offset
+        if record_size > contiguous:
+            _record_length.pack_into(view, start + position, _WRAP_MARKER)
+            head += contiguous
+            position = 0
+
+        start += position
+        _record_length.pack_into(view, start, length)
+        view[start + 4 : start + 4 + length] = payload
+        self._head.value = head + record_size
+        return True
+
+    def try_read(self) -> Optional[bytes]:
+        tail = self._tail.value
+        if tail == self._head.value:
+            return None
+
+        view = self._view
+        position = tail & self._mask
+        start = self._data_offset + position
+        (length,) = _record_length.unpack_from(view, start)
+        if length == _WRAP_MARKER:
+            tail += self.capacity - position
+            start = self._data_offset
+            (length,) = _record_length.unpack_from(view, start)
+
+        payload = bytes(view[start + 4 : start + 4 + length])
+        self._tail.value = tail + ((4 + length + 7) & ~7)
+        return payload
+
+
+class DotNetChannel():
+    """
+    Pair of ring buffers in shared memory for streaming messages
+    between Python and a long-running .NET component, without
+    a call into .NET for each message.
+
+    Messages sent from Python go into the outbound ring, and messages
+    from .NET come back through the inbound ring.  ``connect`` hands
+    the addresses of both rings to the .NET component in a
+    ``channel_descriptor``.  Each ring has a single consumer;
+    any number of Python threads may send.
+
+    Waiting threads are woken up through eventfd, only when the
+    other side has marked itself as waiting, so a steady stream
+    of messages needs no system calls.
+    """
+
+    def __init__(self, capacity: int = 1 << 20):
+        if capacity < 64 or capacity & (capacity - 1) != 0:
+            raise ValueError("capacity must be a power of 2, at least 64")
+
+        ring_size = _RING_HEADER_SIZE + capacity
+        # Anonymous mappings are page-aligned, which more than
+        # satisfies cache-line alignment of the ring headers
+        self._region = mmap.mmap(-1, 2 * ring_size)
+        self._outbound = _Ring(self._region, 0, capacity)
+        self._inbound = _Ring(self._region, ring_size, capacity)
+        self._outbound_signal = _Signal()
+        self._inbound_signal = _Signal()
+        self._send_lock = threading.Lock()
+        self._connected = False
+        self._released = False
+
+    @property
+    def max_message_size(self) -> int:
+        return self._outbound.max_record_size
+
+    def connect(self, delegate) -> int:
+        """
+        Pass the channel to a .NET component, through a
+        ``ComponentEntryPoint`` or raw ``component_entry_point_fn``
+        which should start consuming the outbound ring and return.
+        Its return value is passed through.
+        """
+        function = getattr(delegate, 'function', delegate)
+        descriptor = channel_descriptor(self._outbound.address,
+                                        self._inbound.address,
+                                        self._outbound_signal.read_fd,
+                                        self._inbound_signal.write_fd)
+        err = function(ctypes.addressof(descriptor), ctypes.sizeof(descriptor))
+        if err < 0:
+            raise DotNetHostError(err, "Channel could not be connected")
+
+        self._connected = True
+        return err
+
+    def send(self, message, timeout: Optional[float] = None):
+        """
+        Append a message, which may be any object implementing the
+        buffer protocol, to the outbound ring.  If the ring is full,
+        wait for .NET to consume enough of it, raising TimeoutError
+        if that does not happen within ``timeout`` seconds.
+        """
+        payload = memoryview(message).cast('B')
+        if payload.nbytes > self._outbound.max_record_size:
+            raise ValueError("Message is too large for the channel")
+
+        ring = self._outbound
+        if ring.closed:
+            raise ValueError("Channel is closed")
+
+        with self._send_lock:
+            delay = 0.0
+            deadline = None
+            while not ring.try_write(payload):
+                # The consumer does not signal when space frees up,
+                # so back off exponentially
+                now = time.monotonic()
+                if deadline is None and timeout is not None:
+                    deadline = now + timeout
+                if deadline is not None and now >= deadline:
+                    raise TimeoutError("Timed out waiting for space in the channel")
+                time.sleep(delay)
+                delay = min(max(delay * 2, 1e-5), 1e-3)
+
+        if ring.consumer_waiting:
+            self._outbound_signal.notify()
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Take the next message from the inbound ring, waiting up to
+        ``timeout`` seconds for one to arrive, if given, before raising
+        TimeoutError.  Returns None once .NET has closed its side of
+        the channel and all messages have been received.
+        """
+        ring = self._inbound
+        message = ring.try_read()
+        if message is not None:
+            return message
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if ring.closed:
+                return ring.try_read()
+
+            ring.set_consumer_waiting(True)
+            message = ring.try_read()
+            if message is not None:
+                ring.set_consumer_waiting(False)
+                return message
+
+            wait = _MAX_WAIT_SECONDS
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    ring.set_consumer_waiting(False)
+                    raise TimeoutError("Timed out waiting for a message from the channel")
+                wait = min(wait, remaining)
+
+            self._inbound_signal.wait(wait)
+            ring.set_consumer_waiting(False)
+
+            message = ring.try_read()
+            if message is not None:
+                return message
+
+    def receive_many(self, max_count: int) -> List[bytes]:
+        """
+        Take up to ``max_count`` messages that are already waiting
+        in the inbound ring, without blocking.
+        """
+        ring = self._inbound
+        messages = []
+        while len(messages) < max_count:
+            message = ring.try_read()
+            if message is None:
+                break
+            messages.append(message)
+        return messages
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """
+        Tell .NET that no more messages will be sent, and wait for it
+        to close its side, discarding any messages not received yet.
+
+        The shared memory is only unmapped if .NET acknowledges, since
+        otherwise it might still be accessing it.  Returns whether
+        it did.
+        """
+        if self._released:
+            return True
+
+        self._outbound.close()
+        self._outbound_signal.notify()
+
+        if self._connected:
+            deadline = time.monotonic() + timeout
+            try:
+                while self.receive(max(0.0, deadline - time.monotonic())) is not None:
+                    pass
+            except TimeoutError:
+                return False
+
+        self._released = True
+        self._outbound.release()
+        self._inbound.release()
+        self._region.close()
+        self._outbound_signal.close()
+        self._inbound_signal.close()
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,7 +1,21 @@
+import array
+import asyncio
 import ctypes
+import itertools
+import json
+import logging
+import mmap
 import sys 
 import os.path
-from typing import Optional, Sequence
+import queue
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+_logger = logging.getLogger("dotnetpy")
 
 class DotNetHostError(Exception):
     def __init__(self, error_code, message):
@@ -29,6 +43,8 @@ if sys.platform == 'win32':
     def create_tstring_buffer(init_or_size): 
         return ctypes.create_unicode_buffer(init_or_size) 
 
+    WINFUNCTYPE = ctypes.WINFUNCTYPE
+
 else: 
     # There is no "stdcall" on Unix; the .NET Core API  just revert 
     # to "cdecl calling" convention then. 
@@ -54,10 +70,20 @@ else:
             init_or_size = to_tstring(init_or_size)
         return ctypes.create_string_buffer(init_or_size) 
 
+    # ctypes only defines WINFUNCTYPE on Windows
+    WINFUNCTYPE = ctypes.CFUNCTYPE
+
 def _c_int_error_check(result: ctypes.c_int, func, arguments): 
     if result != 0: 
         raise DotNetHostError(result, "API call failed")
 
+def _c_int_success_check(result: ctypes.c_int, func, arguments): 
+    # For functions that may return a status code indicating 
+    # success with qualifications
+    if result < 0: 
+        raise DotNetHostError(result, "API call failed")
+    return result
+
 class get_hostfxr_parameters(ctypes.Structure): 
     _fields_ =  [("size", ctypes.c_size_t), 
                  ("assembly_path", c_tchar_p), 
@@ -70,49 +96,49 @@ class hostfxr_initialize_parameters(ctypes.Structure):
                  ("dotnet_root", c_tchar_p)] 
 
 class StatusCode: 
-    Success                             = 1
-    Success_HostAlreadyInitialized      = 2
-    Success_DifferentRuntimeProperties  = 3
+    Success                             = 0
+    Success_HostAlreadyInitialized      = 1
+    Success_DifferentRuntimeProperties  = 2
 
     # Failure 
-    InvalidArgFailure                   = -2147450750 + 1 
-    CoreHostLibLoadFailure              = -2147450750 + 2 
-    CoreHostLibMissingFailure           = -2147450750 + 3 
-    CoreHostEntryPointFailure           = -2147450750 + 4 
-    CoreHostCurHostFindFailure          = -2147450750 + 5 
-    #  unused                           = -2147450750 + 6
-    CoreClrResolveFailure               = -2147450750 + 7 
-    CoreClrBindFailure                  = -2147450750 + 8 
-    CoreClrinitFailure                  = -2147450750 + 9 
-    CoreClrExeFailure                   = -2147450750 + 10 
-    ResolverInitFailure                 = -2147450750 + 11 
-    ResolverResolveFailure              = -2147450750 + 12 
-    LibHostCurExeFindFailure            = -2147450750 + 13 
-    LibHostInitFailure                  = -2147450750 + 14 
-    #  unused                           = -2147450750 + 15 
-    LibHostExecModeFailure              = -2147450750 + 16 
-    LibHostSdkFindFailure               = -2147450750 + 17 
-    LibHostInvalidArgs                  = -2147450750 + 18 
-    InvalidConfigFile                   = -2147450750 + 19 
-    AppArgNotRunnable                   = -2147450750 + 20 
-    AppHostExeNotBoundFailure           = -2147450750 + 21 
-    FrameworkMissingFailure             = -2147450750 + 22 
-    HostApiFailed                       = -2147450750 + 23 
-    HostApiBufferTooSmall               = -2147450750 + 24 
-    LibHostUnknownCommand               = -2147450750 + 25 
-    LibHostAppRootFindFailure           = -2147450750 + 26 
-    SdkResolverResolveFailure           = -2147450750 + 27 
-    FrameworkCompatFailure              = -2147450750 + 28 
-    FrameworkCompatRetry                = -2147450750 + 29 
-    #  unused                           = -2147450750 + 30 
-    BundleExtractionFailure             = -2147450750 + 31 
-    BundleExtractionI0Error             = -2147450750 + 32 
-    LibHostDuplicateProperty            = -2147450750 + 33 
-    HostApiUnsupportedVersion           = -2147450750 + 34 
-    HostInvalidState                    = -2147450750 + 35 
-    HostPropertyNotFound                = -2147450750 + 36 
-    CoreHostIncompatibleConfig          = -2147450750 + 37 
-    HostApiUnsupportedScenario          = -2147450750 + 38 
+    InvalidArgFailure                   = -2147450752 + 1 
+    CoreHostLibLoadFailure              = -2147450752 + 2 
+    CoreHostLibMissingFailure           = -2147450752 + 3 
+    CoreHostEntryPointFailure           = -2147450752 + 4 
+    CoreHostCurHostFindFailure          = -2147450752 + 5 
+    #  unused                           = -2147450752 + 6
+    CoreClrResolveFailure               = -2147450752 + 7 
+    CoreClrBindFailure                  = -2147450752 + 8 
+    CoreClrinitFailure                  = -2147450752 + 9 
+    CoreClrExeFailure                   = -2147450752 + 10 
+    ResolverInitFailure                 = -2147450752 + 11 
+    ResolverResolveFailure              = -2147450752 + 12 
+    LibHostCurExeFindFailure            = -2147450752 + 13 
+    LibHostInitFailure                  = -2147450752 + 14 
+    #  unused                           = -2147450752 + 15 
+    LibHostExecModeFailure              = -2147450752 + 16 
+    LibHostSdkFindFailure               = -2147450752 + 17 
+    LibHostInvalidArgs                  = -2147450752 + 18 
+    InvalidConfigFile                   = -2147450752 + 19 
+    AppArgNotRunnable                   = -2147450752 + 20 
+    AppHostExeNotBoundFailure           = -2147450752 + 21 
+    FrameworkMissingFailure             = -2147450752 + 22 
+    HostApiFailed                       = -2147450752 + 23 
+    HostApiBufferTooSmall               = -2147450752 + 24 
+    LibHostUnknownCommand               = -2147450752 + 25 
+    LibHostAppRootFindFailure           = -2147450752 + 26 
+    SdkResolverResolveFailure           = -2147450752 + 27 
+    FrameworkCompatFailure              = -2147450752 + 28 
+    FrameworkCompatRetry                = -2147450752 + 29 
+    #  unused                           = -2147450752 + 30 
+    BundleExtractionFailure             = -2147450752 + 31 
+    BundleExtractionI0Error             = -2147450752 + 32 
+    LibHostDuplicateProperty            = -2147450752 + 33 
+    HostApiUnsupportedVersion           = -2147450752 + 34 
+    HostInvalidState                    = -2147450752 + 35 
+    HostPropertyNotFound                = -2147450752 + 36 
+    CoreHostIncompatibleConfig          = -2147450752 + 37 
+    HostApiUnsupportedScenario          = -2147450752 + 38 
 
 
 class hostfxr_delegate_type: 
@@ -128,26 +154,1309 @@ c_hostfxr_handle = ctypes.c_void_p
 
 
 load_assembly_and_get_function_pointer_fn = \
-   ctypes.WINFUNCTYPE (ctypes.c_int, 
-                       c_tchar_p,         # assembly path 
-                       c_tchar_p,         # type_name 
-                       c_tchar_p,         # method_name 
-                       c_tchar_p,         # delegate_type name, 
-                       ctypes.c_void_p,   # reserved 
-                       ctypes.POINTER(ctypes.c_void_p))  # OUT delegate 
+   WINFUNCTYPE(ctypes.c_int, 
+               c_tchar_p,         # assembly path 
+               c_tchar_p,         # type_name 
+               c_tchar_p,         # method_name 
+               ctypes.c_void_p,   # delegate_type name, or UNMANAGEDCALLERSONLY_METHOD
+               ctypes.c_void_p,   # reserved 
+               ctypes.POINTER(ctypes.c_void_p))  # OUT delegate 
+
+# Passed as the delegate type name to get a function pointer to a method
+# marked [UnmanagedCallersOnly], which needs no marshalling stub (.NET 5+)
+UNMANAGEDCALLERSONLY_METHOD = ctypes.c_void_p(-1)
 
 component_entry_point_fn = \
-   ctypes.WINFUNCTYPE(ctypes.c_int, 
-                      ctypes.c_void_p, 
-                      ctypes.c_int) 
+   WINFUNCTYPE(ctypes.c_int, 
+               ctypes.c_void_p, 
+               ctypes.c_int) 
+
+class batch_descriptor(ctypes.Structure):
+    """
+    Argument passed by ``DotNetSession.call_batch`` to a batch-aware 
+    component entry point, as ``argPtr``.
+
+    ``items`` points to ``count`` pairs of 64-bit integers, giving the
+    offset and length of each payload within ``arena``.  The .NET
+    function stores the status for each payload into the 32-bit
+    integers at ``statuses``.
+    """
+    _fields_ = [("count", ctypes.c_int),
+                ("reserved", ctypes.c_int),
+                ("arena", ctypes.c_void_p),          # payload bytes
+                ("items", ctypes.c_void_p),          # int64 offset, int64 length
+                ("statuses", ctypes.c_void_p)]       # OUT int32 per payload
+
+async_completion_fn = \
+   WINFUNCTYPE(None,
+               ctypes.c_ssize_t,    # token
+               ctypes.c_int)        # status
+
+class async_call_descriptor(ctypes.Structure):
+    """
+    Argument passed by ``DotNetSession.call_async`` to a .NET function
+    that completes asynchronously, as ``argPtr``.
+
+    The .NET function must copy this structure before returning, 
+    start its work, and return a non-negative value.  When the work is 
+    done, it calls ``completion`` with ``token`` and the status to report,
+    from any thread, exactly once.  The memory at ``arg`` stays valid
+    until then.  If the .NET function returns a negative value instead,
+    it must not call ``completion``.
+    """
+    _fields_ = [("completion", ctypes.c_void_p),     # async_completion_fn
+                ("token", ctypes.c_ssize_t),
+                ("arg", ctypes.c_void_p),
+                ("arg_size", ctypes.c_int)]
+
+stream_emit_fn = \
+   WINFUNCTYPE(ctypes.c_int,        # OUT index of the next chunk to fill, or -1 to stop
+               ctypes.c_int,        # index of the chunk that has been filled
+               ctypes.c_int)        # number of bytes filled in the chunk
+
+class stream_descriptor(ctypes.Structure):
+    """
+    Argument passed by ``DotNetSession.stream`` to a .NET function
+    producing a stream of data, as ``argPtr``.
+
+    ``chunks`` points to ``chunk_count`` pointers to buffers of 
+    ``chunk_size`` bytes each.  The .NET function fills the first chunk,
+    then calls ``emit`` with its index and the number of bytes filled.
+    ``emit`` blocks until Python has a chunk free again, and returns 
+    its index for .NET to fill next.  When ``emit`` returns -1, Python 
+    has stopped reading and .NET must return without emitting any more.
+    The return value of the .NET function becomes the status of 
+    the stream; it is an error if negative.
+    """
+    _fields_ = [("emit", ctypes.c_void_p),        # stream_emit_fn
+                ("request", ctypes.c_void_p),
+                ("chunks", ctypes.c_void_p),
+                ("request_size", ctypes.c_int),
+                ("chunk_size", ctypes.c_int),
+                ("chunk_count", ctypes.c_int)]
 
 _g_nethost = None 
+_g_hostfxr_path = None
+_g_hostfxr_dlls = {}
+
+def _get_discovery_dirs(hostfxr_path: str) -> Sequence[str]:
+    # The directory containing hostfxr, the directory listing all 
+    # versions of hostfxr, and the .NET installation directory.
+    # Installing or removing a version of .NET modifies one of these.
+    fxr_version_dir = os.path.dirname(hostfxr_path)
+    fxr_dir = os.path.dirname(fxr_version_dir)
+    return [ fxr_version_dir, fxr_dir, os.path.dirname(os.path.dirname(fxr_dir)) ]
+
+def _read_discovery_cache(cache_path: str, key: str) -> Optional[str]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)[key]
+
+        hostfxr_path = entry["hostfxr_path"]
+        mtimes = entry["mtimes"]
+        dirs = _get_discovery_dirs(hostfxr_path)
+        if not os.path.isfile(hostfxr_path) or sorted(mtimes) != sorted(dirs):
+            return None
+        for d in dirs:
+            if os.stat(d).st_mtime_ns != mtimes[d]:
+                return None
+
+        return hostfxr_path
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _write_discovery_cache(cache_path: str, key: str, hostfxr_path: str):
+    try:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if not isinstance(entries, dict):
+                entries = {}
+        except (OSError, ValueError):
+            entries = {}
+
+        entries[key] = { 
+            "hostfxr_path": hostfxr_path,
+            "mtimes": { d: os.stat(d).st_mtime_ns for d in _get_discovery_dirs(hostfxr_path) }
+        }
+
+        # Write to a temporary file first so concurrently starting 
+        # processes never see a partially-written cache
+        cache_dir = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+
+class _Py_buffer(ctypes.Structure):
+    _fields_ = [("buf", ctypes.c_void_p),
+                ("obj", ctypes.c_void_p),
+                ("len", ctypes.c_ssize_t),
+                ("itemsize", ctypes.c_ssize_t),
+                ("readonly", ctypes.c_int),
+                ("ndim", ctypes.c_int),
+                ("format", ctypes.c_char_p),
+                ("shape", ctypes.POINTER(ctypes.c_ssize_t)),
+                ("strides", ctypes.POINTER(ctypes.c_ssize_t)),
+                ("suboffsets", ctypes.POINTER(ctypes.c_ssize_t)),
+                ("internal", ctypes.c_void_p)]
+
+# PyBUF_ANY_CONTIGUOUS: accept C or Fortran order but nothing with gaps
+_PyBUF_ANY_CONTIGUOUS = 0x0080 | 0x0010 | 0x0008
+
+# Our own prototypes so as not to disturb ctypes.pythonapi's shared objects
+_PyObject_GetBuffer = \
+    ctypes.PYFUNCTYPE(ctypes.c_int, 
+                      ctypes.py_object, 
+                      ctypes.POINTER(_Py_buffer), 
+                      ctypes.c_int)(("PyObject_GetBuffer", ctypes.pythonapi))
+
+_PyBuffer_Release = \
+    ctypes.PYFUNCTYPE(None, 
+                      ctypes.POINTER(_Py_buffer))(("PyBuffer_Release", ctypes.pythonapi))
+
+# Largest argSize that fits in the int parameter of component_entry_point_fn
+_MAX_ARG_SIZE = 0x7FFFFFFF
+
+
+class _PinnedBuffer():
+    """
+    Holds on to the memory of a Python object implementing the buffer
+    protocol, so its address can be passed to native code without copying.
+
+    The exporting object cannot resize or free the memory until 
+    the buffer is released.  Non-contiguous buffers are rejected 
+    with BufferError.
+    """
+
+    __slots__ = ('_view', 'address', 'length')
+
+    def __init__(self, obj):
+        self._view = None
+        view = _Py_buffer()
+        _PyObject_GetBuffer(obj, view, _PyBUF_ANY_CONTIGUOUS)
+        self._view = view
+        self.address = view.buf
+        self.length = view.len
+
+    def release(self):
+        view = self._view
+        if view is not None:
+            self._view = None
+            _PyBuffer_Release(view)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __del__(self):
+        self.release()
+
+
+def _get_argument_pointer(arg):
+    """
+    Get the address and length of the argument to pass to a component
+    entry point, with the ``_PinnedBuffer`` to release after the call,
+    or None if nothing needs releasing.
+
+    argSize is a 32-bit int, and ctypes would silently truncate
+    longer lengths, so they are rejected with OverflowError.
+    """
+    if arg is None:
+        return None, None, 0
+
+    if type(arg) is PooledBuffer:
+        # A released buffer may already have been handed out again
+        if arg._pool is None:
+            raise ValueError("PooledBuffer has been released")
+        pinned = None
+        address = arg.address
+        length = arg.length
+    else:
+        pinned = _PinnedBuffer(arg)
+        address = pinned.address
+        length = pinned.length
+
+    if length > _MAX_ARG_SIZE:
+        if pinned is not None:
+            pinned.release()
+        raise OverflowError("Buffer is too large to pass to a component entry point")
+
+    return pinned, address, length
+
+
+class ComponentEntryPoint():
+    """
+    Calls a .NET function having the default signature
+    of ``component_entry_point_fn``: ``int (IntPtr argPtr, int argSize)``.
+
+    The argument may be any object implementing Python's buffer protocol,
+    e.g. bytes, bytearray, memoryview, array.array, mmap or NumPy arrays.
+    Its memory is passed to .NET directly, without copying, as 
+    ``argPtr`` and ``argSize``.  The memory is only guaranteed to stay 
+    in place for the duration of the call.  .NET code must not write 
+    into the buffer if the object is read-only, like bytes.
+    """
+
+    def __init__(self,
+                 function,
+                 assembly_path: Optional[str] = None,
+                 type_name: Optional[str] = None,
+                 method_name: Optional[str] = None):
+        self.function = function
+        self.assembly_path = assembly_path
+        self.type_name = type_name
+        self.method_name = method_name
+
+    def __call__(self, arg=None) -> int:
+        pinned, address, length = _get_argument_pointer(arg)
+        try:
+            return self.function(address, length)
+        finally:
+            if pinned is not None:
+                pinned.release()
+
+    def __repr__(self):
+        return f"<ComponentEntryPoint {self.type_name}::{self.method_name}>"
+
+
+class BufferPoolStats(NamedTuple):
+    """
+    Snapshot of the activity of a ``BufferPool``.
+    """
+    allocations: int            # buffers allocated from the operating system
+    allocations_avoided: int    # requests satisfied by reusing a buffer
+    in_use_bytes: int           # capacity of buffers currently handed out
+    high_water_bytes: int       # largest value of in_use_bytes so far
+    cached_bytes: int           # capacity of free buffers kept for reuse
+    fragmentation: float        # fraction of in_use_bytes not requested by callers
+
+
+class PooledBuffer():
+    """
+    Native buffer handed out by ``BufferPool``, returned to the pool
+    by ``release`` or on leaving a ``with`` block.
+
+    The buffer starts on a page boundary and holds at least ``length``
+    bytes; ``view`` is a writable memoryview of those bytes.  It may be 
+    passed directly to a ``ComponentEntryPoint``, as ``address`` and
+    ``length``.  The buffer must not be used after it is released;
+    taking its ``view`` or passing it to an entry point then raises
+    ValueError.
+    """
+
+    __slots__ = ('_pool', '_memory', '_anchor', 'address', 'capacity', 'length')
+
+    def __init__(self, pool: 'BufferPool', capacity: int):
+        self._pool = pool
+        # Anonymous mappings are page-aligned
+        self._memory = mmap.mmap(-1, capacity)
+        self._anchor = ctypes.c_char.from_buffer(self._memory)
+        self.address = ctypes.addressof(self._anchor)
+        self.capacity = capacity
+        self.length = 0
+
+    @property
+    def view(self) -> memoryview:
+        if self._pool is None:
+            raise ValueError("PooledBuffer has been released")
+        return memoryview(self._memory)[:self.length]
+
+    def release(self):
+        pool = self._pool
+        if pool is not None:
+            self._pool = None
+            pool._put(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class BufferPool():
+    """
+    Pool of page-aligned native buffers, to be reused for passing
+    data to .NET instead of allocating memory for every call.
+
+    Requested sizes are rounded up to size classes that are powers
+    of 2, starting from the page size.  Released buffers are kept
+    for reuse as long as the total kept does not exceed
+    ``max_cached_bytes``.  Buffers larger than ``max_pooled_size``
+    are allocated on each request and not kept.
+    """
+
+    def __init__(self, 
+                 max_cached_bytes: int = 64 << 20,
+                 max_pooled_size: int = 16 << 20):
+        self.max_cached_bytes = max_cached_bytes
+        self.max_pooled_size = max_pooled_size
+        self._free = {}
+        self._lock = threading.Lock()
+        self._allocations = 0
+        self._allocations_avoided = 0
+        self._in_use_bytes = 0
+        self._requested_bytes = 0
+        self._high_water_bytes = 0
+        self._cached_bytes = 0
+
+    @staticmethod
+    def size_class(size: int) -> int:
+        """
+        Capacity of the buffer that would be handed out for ``size`` bytes.
+        """
+        return max(mmap.PAGESIZE, 1 << (size - 1).bit_length())
+
+    def acquire(self, size: int) -> PooledBuffer:
+        """
+        Get a buffer of at least ``size`` bytes.  Its contents are
+        not cleared when it is reused.
+        """
+        if size < 0:
+            raise ValueError("size must not be negative")
+
+        capacity = self.size_class(size)
+        buffer = None
+        with self._lock:
+            free = self._free.get(capacity)
+            if free:
+                buffer = free.pop()
+                self._cached_bytes -= capacity
+                self._allocations_avoided += 1
+            else:
+                self._allocations += 1
+
+            self._in_use_bytes += capacity
+            self._requested_bytes += size
+            if self._in_use_bytes > self._high_water_bytes:
+                self._high_water_bytes = self._in_use_bytes
+
+        if buffer is None:
+            try:
+                buffer = PooledBuffer(self, capacity)
+            except BaseException:
+                with self._lock:
+                    self._in_use_bytes -= capacity
+                    self._requested_bytes -= size
+                raise
+        else:
+            buffer._pool = self
+
+        buffer.length = size
+        return buffer
+
+    def _put(self, buffer: PooledBuffer):
+        capacity = buffer.capacity
+        with self._lock:
+            self._in_use_bytes -= capacity
+            self._requested_bytes -= buffer.length
+            if capacity <= self.max_pooled_size and \
+               self._cached_bytes + capacity <= self.max_cached_bytes:
+                self._free.setdefault(capacity, []).append(buffer)
+                self._cached_bytes += capacity
+
+    def trim(self):
+        """
+        Free all buffers kept for reuse.
+        """
+        with self._lock:
+            self._free.clear()
+            self._cached_bytes = 0
+
+    @property
+    def stats(self) -> BufferPoolStats:
+        with self._lock:
+            in_use_bytes = self._in_use_bytes
+            return BufferPoolStats(
+                self._allocations,
+                self._allocations_avoided,
+                in_use_bytes,
+                self._high_water_bytes,
+                self._cached_bytes,
+                1.0 - self._requested_bytes / in_use_bytes if in_use_bytes > 0 else 0.0)
+
+
+# Asynchronous calls in flight, by token: (event loop, future, pinned argument)
+_g_async_calls = {}
+_g_async_tokens = itertools.count(1)
+
+# Completed calls waiting to be delivered to each event loop
+_g_async_completed = {}
+_g_async_completed_lock = threading.Lock()
+
+def _complete_async_call(token: int, status: int):
+    # Called from .NET on an arbitrary thread.  Completions are queued
+    # per event loop, and the event loop is only woken up for the first
+    # one queued, so a burst of completions costs one wake-up.
+    entry = _g_async_calls.pop(token, None)
+    if entry is None:
+        return
+
+    loop, future, pinned = entry
+    if pinned is not None:
+        pinned.release()
+
+    with _g_async_completed_lock:
+        completed = _g_async_completed.get(loop)
+        wake_up = completed is None
+        if wake_up:
+            completed = _g_async_completed[loop] = []
+        completed.append((future, status))
+
+    if wake_up:
+        try:
+            loop.call_soon_threadsafe(_deliver_async_completions, loop)
+        except RuntimeError:
+            # Event loop has been closed
+            with _g_async_completed_lock:
+                _g_async_completed.pop(loop, None)
+
+def _abandon_async_call(token: int):
+    # For calls that .NET has refused to start
+    entry = _g_async_calls.pop(token, None)
+    if entry is not None and entry[2] is not None:
+        entry[2].release()
+
+def _deliver_async_completions(loop: asyncio.AbstractEventLoop):
+    with _g_async_completed_lock:
+        completed = _g_async_completed.pop(loop, ())
+
+    for future, status in completed:
+        if not future.done():
+            future.set_result(status)
+
+_async_completion = async_completion_fn(_complete_async_call)
+
+
+_g_prototypes = {}
+
+# Names of types, for signatures written out in text, following C#
+_g_ctypes_by_name = {
+    'void': None,
+    'bool': ctypes.c_bool,
+    'sbyte': ctypes.c_int8, 'int8': ctypes.c_int8,
+    'byte': ctypes.c_uint8, 'uint8': ctypes.c_uint8,
+    'short': ctypes.c_int16, 'int16': ctypes.c_int16,
+    'ushort': ctypes.c_uint16, 'uint16': ctypes.c_uint16,
+    'int': ctypes.c_int32, 'int32': ctypes.c_int32,
+    'uint': ctypes.c_uint32, 'uint32': ctypes.c_uint32,
+    'long': ctypes.c_int64, 'int64': ctypes.c_int64,
+    'ulong': ctypes.c_uint64, 'uint64': ctypes.c_uint64,
+    'nint': ctypes.c_ssize_t, 'nuint': ctypes.c_size_t,
+    'float': ctypes.c_float, 'double': ctypes.c_double,
+    'IntPtr': ctypes.c_void_p, 'pointer': ctypes.c_void_p,
+}
+
+def _to_ctypes_type(t):
+    if t is None or hasattr(t, 'from_param'):
+        return t
+
+    if isinstance(t, str):
+        if t in _g_ctypes_by_name:
+            return _g_ctypes_by_name[t]
+        if t.startswith('c_') and hasattr(ctypes, t):
+            return getattr(ctypes, t)
+        if t.endswith('*'):
+            return ctypes.c_void_p
+        raise TypeError(f"Unknown type name {t!r}")
+
+    # NumPy scalar types and dtypes; NumPy is optional
+    try:
+        import numpy
+    except ImportError:
+        raise TypeError(f"{t!r} is not a ctypes type") from None
+    return numpy.ctypeslib.as_ctypes_type(numpy.dtype(t))
+
+def get_function_prototype(signature):
+    """
+    Get the ctypes function pointer type, with the platform's default
+    calling convention, for a signature given as the return type 
+    followed by the argument types.  
+    
+    Function pointer types are cached, so they are only created 
+    once per signature.  If ``signature`` is already a function 
+    pointer type, it is returned unchanged.
+    """
+    if isinstance(signature, type) and issubclass(signature, ctypes._CFuncPtr):
+        return signature
+
+    signature = tuple(signature)
+    prototype = _g_prototypes.get(signature)
+    if prototype is None:
+        restype, *argtypes = [ _to_ctypes_type(t) for t in signature ]
+        prototype = WINFUNCTYPE(restype, *argtypes)
+        _g_prototypes[signature] = prototype
+    return prototype
+
+
+# ctypes type codes of integer types
+_INTEGER_TYPE_CODES = frozenset('bBhHiIlLqQ')
+
+def _get_default_error_result(restype):
+    # Returned to .NET when a callback raises an exception; ctypes
+    # cannot convert None to anything other than void or a pointer
+    if restype is None:
+        return None
+    code = getattr(restype, '_type_', None)
+    if code in _INTEGER_TYPE_CODES:
+        return -1
+    if code == '?':
+        return False
+    if code in ('f', 'd', 'g'):
+        return float('nan')
+    if code in ('P', 'z', 'Z'):
+        return None
+    raise TypeError(f"error_result must be given for callbacks returning {restype!r}")
+
+
+event_batch_fn = \
+   WINFUNCTYPE(ctypes.c_int,        # status; negative if the callback raised an exception
+               ctypes.c_void_p,     # events
+               ctypes.c_int)        # number of events
+
+# Callbacks not yet released, from all registries in the process
+_g_callbacks = {}
+_g_callbacks_lock = threading.Lock()
+
+class Callback():
+    """
+    Python callable exposed to .NET as a native function pointer,
+    created by ``CallbackRegistry``.
+
+    The native function pointer stays valid until ``release`` is called, 
+    and .NET must not call it afterwards.  If the callable raises an
+    exception, it is kept in ``last_exception`` and ``error_result`` is 
+    returned to .NET instead.  Unless given, ``error_result`` is -1 for 
+    integer return types, NaN for floating-point types, false for 
+    bool, and null for pointers.
+    """
+
+    def __init__(self, 
+                 registry: 'CallbackRegistry', 
+                 prototype, 
+                 function: Callable, 
+                 error_result=None):
+        if error_result is None:
+            error_result = _get_default_error_result(prototype._restype_)
+
+        self.prototype = prototype
+        self.python_function = function
+        self.error_result = error_result
+        self.last_exception = None
+        self._registry = registry
+
+        def invoke(*args):
+            try:
+                return function(*args)
+            except BaseException as e:
+                self.last_exception = e
+                return error_result
+
+        self._native = prototype(invoke)
+        self._address = ctypes.cast(self._native, ctypes.c_void_p).value
+
+    @property
+    def released(self) -> bool:
+        return self._native is None
+
+    @property
+    def address(self) -> int:
+        """
+        Address of the native function, to pass to .NET.
+        """
+        if self._native is None:
+            raise ValueError("Callback has been released")
+        return self._address
+
+    @property
+    def function(self):
+        """
+        The ctypes function object, which may be passed as an 
+        argument to a function bound through ``DotNetSession.bind``.
+        """
+        if self._native is None:
+            raise ValueError("Callback has been released")
+        return self._native
+
+    def release(self):
+        """
+        Drop the native function pointer.  Releasing twice is harmless.
+        """
+        if self._native is not None:
+            self._registry._remove(self)
+            self._native = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __repr__(self):
+        state = "released" if self._native is None else f"0x{self._address:x}"
+        return f"<Callback {getattr(self.python_function, '__qualname__', '?')} {state}>"
+
+
+class CallbackRegistry():
+    """
+    Keeps Python callables passed to .NET as function pointers alive.
+
+    A ctypes function pointer is only valid as long as the Python
+    object created for it is, and if it is garbage-collected while
+    .NET still holds the pointer, the process crashes on the next call.
+    Callbacks registered here are held until they are released
+    explicitly, individually or all together.  They stay alive even
+    if the registry, or the ``DotNetSession`` it belongs to, is 
+    garbage-collected, like the .NET run-time that may still be 
+    holding their pointers.
+    """
+
+    def __init__(self):
+        self._callbacks = {}
+        self._lock = _g_callbacks_lock
+
+    def __len__(self):
+        return len(self._callbacks)
+
+    def register(self, function: Callable, signature, error_result=None) -> Callback:
+        """
+        Expose ``function`` as a native function with the given 
+        signature, in the same form as for ``DotNetSession.bind``.
+        ``error_result`` is returned to .NET if ``function`` raises
+        an exception, as described for ``Callback``.
+        """
+        callback = Callback(self, get_function_prototype(signature), function, error_result)
+        with self._lock:
+            self._callbacks[id(callback)] = callback
+            _g_callbacks[id(callback)] = callback
+        return callback
+
+    def register_batched(self, function: Callable, event_type) -> Callback:
+        """
+        Expose ``function`` as a native ``event_batch_fn``, through
+        which .NET passes an array of events, of the ctypes type 
+        ``event_type``, per call.  Notifications from .NET that are
+        frequent are best batched, since each call has to acquire 
+        the GIL.
+
+        ``function`` receives a ctypes array over the events, which
+        is only valid during the call.  It returns a non-negative
+        status, or None for 0; an exception is reported to .NET as -1.
+        """
+        event_type = _to_ctypes_type(event_type)
+
+        def invoke(events: int, count: int) -> int:
+            if count <= 0:
+                return 0
+            batch = (event_type * count).from_address(events)
+            result = function(batch)
+            return 0 if result is None else result
+
+        callback = self.register(invoke, event_batch_fn, error_result=-1)
+        callback.python_function = function
+        return callback
+
+    def _remove(self, callback: Callback):
+        with self._lock:
+            self._callbacks.pop(id(callback), None)
+            _g_callbacks.pop(id(callback), None)
+
+    def release_all(self):
+        """
+        Release all callbacks.  .NET must not call any of them afterwards.
+        """
+        with self._lock:
+            callbacks = list(self._callbacks.values())
+        for callback in callbacks:
+            callback.release()
+
+
+class EntryPointCache():
+    """
+    Cache of entry points resolved through .NET's
+    ``load_assembly_and_get_function_pointer``, with least-recently-used
+    eviction once the number of entries reaches ``capacity``.
+
+    Resolving an entry point requires .NET to look up the assembly, type
+    and method by reflection, so callers that obtain the same function
+    repeatedly get it from here instead.  A capacity of None means the
+    cache is unbounded; a capacity of 0 disables caching.
+    """
+
+    def __init__(self, capacity: Optional[int] = 256):
+        if capacity is not None and capacity < 0:
+            raise ValueError("capacity must not be negative")
+
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def capacity(self) -> Optional[int]:
+        return self._capacity
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """
+        Get the cached entry point for ``key``, or None if it is not cached.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value):
+        """
+        Add an entry point to the cache, evicting the least recently 
+        used entries if the cache is full.
+        """
+        capacity = self._capacity
+        if capacity == 0:
+            return
+
+        with self._lock:
+            entries = self._entries
+            entries[key] = value
+            entries.move_to_end(key)
+            if capacity is not None:
+                while len(entries) > capacity:
+                    entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        Remove the entry point for ``key`` from the cache, or all 
+        entry points if ``key`` is None.
+
+        Entries need to be invalidated if the assembly they come from
+        gets replaced, since .NET would then need to be asked to resolve 
+        the functions again.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class StartupProfile():
+    """
+    Timings of the phases of starting .NET for a ``DotNetSession``.
+
+    ``phases`` lists (name, start, duration) for each phase in the order
+    they ran, with times in seconds from ``time.perf_counter``.
+    Phases whose results had already been obtained earlier in the 
+    process, like loading the "nethost" DLL, are not listed.  
+    The last two phases, which start the .NET run-time, happen on the 
+    first call to ``load_assembly_and_get_function_pointer`` in the 
+    process, and are only listed for the session making it.  
+    If the run-time is instead started so that another host context
+    can be created, starting it is listed for the session that
+    created the primary host context.
+
+    If ``callback`` is given, it is called with the name and 
+    duration of each phase as it finishes, e.g. to report to 
+    a metrics system.  Exceptions raised by the callback are logged
+    and otherwise ignored.
+    """
+
+    NETHOST_LOAD = "nethost_load"
+    READ_DISCOVERY_CACHE = "read_discovery_cache"
+    GET_HOSTFXR_PATH = "get_hostfxr_path"
+    HOSTFXR_LOAD = "hostfxr_load"
+    INITIALIZE_FOR_RUNTIME_CONFIG = "initialize_for_runtime_config"
+    GET_RUNTIME_DELEGATE = "get_runtime_delegate"
+    FIRST_LOAD_ASSEMBLY = "first_load_assembly"
+
+    def __init__(self, callback: Optional[Callable[[str, float], None]] = None):
+        self.phases = []
+        self.callback = callback
+
+    @contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def record(self, name: str, start: float, duration: float):
+        self.phases.append((name, start, duration))
+        callback = self.callback
+        if callback is not None:
+            # Phases are recorded in the middle of starting .NET, which
+            # must not be abandoned because reporting a timing failed
+            try:
+                callback(name, duration)
+            except Exception:
+                _logger.exception("Start-up callback failed for phase %s", name)
+
+    @property
+    def total(self) -> float:
+        """
+        Total time in seconds spent in all phases.
+        """
+        return sum(duration for _, _, duration in self.phases)
+
+    def as_dict(self) -> dict:
+        """
+        Get the duration of each phase keyed by name.
+        """
+        return { name: duration for name, _, duration in self.phases }
+
+    def __repr__(self):
+        phases = ", ".join(f"{name}={duration * 1000:.3f}ms" for name, _, duration in self.phases)
+        return f"<StartupProfile {phases}>"
+
+
+@contextmanager
+def _measure(profile: Optional[StartupProfile], name: str):
+    if profile is None:
+        yield
+    else:
+        with profile.measure(name):
+            yield
+
+
+class ManifestEntry(NamedTuple):
+    """
+    Entry point listed in an ``EntryPointManifest``.
+    """
+    name: str
+    assembly_path: str
+    type_name: str
+    method_name: str
+    delegate_name: Optional[str] = None
+    signature: Optional[tuple] = None
+    warm_up: object = None          # argument, or tuple of arguments if signature is set
+    warm_up_calls: int = 1
+
+
+class EntryPointManifest():
+    """
+    List of .NET entry points to resolve all at once, typically when
+    a session starts, so that the cost of reflection and JIT compilation 
+    is not paid while serving requests.
+
+    A manifest is a mapping, or a JSON or TOML file holding one, like::
+
+        {
+            "assembly": "bin/MyComponent.dll",
+            "entry_points": [
+                { "name": "parse", 
+                  "type": "MyComponent.Api, MyComponent", 
+                  "method": "Parse",
+                  "warm_up": "{}",
+                  "warm_up_calls": 30 },
+                { "name": "add",
+                  "type": "MyComponent.Api, MyComponent", 
+                  "method": "Add",
+                  "signature": ["int", "int", "int"],
+                  "warm_up": [1, 2] }
+            ]
+        }
+
+    Each entry names the type and method, and optionally an "assembly"
+    overriding the default.  Entries with a "signature", in the form
+    taken by ``DotNetSession.bind``, are bound to that signature, 
+    going through a "delegate" type if given.  Entries with only a 
+    "delegate" type are resolved to the address of the function, as 
+    by ``DotNetSession.load_assembly_and_get_function_pointer``, and 
+    cannot be warmed up.  Other entries are component entry points.  
+    "name" defaults to the method name.
+
+    "warm_up" is an argument to call the entry point with after 
+    resolving it, "warm_up_calls" times: a string, which is encoded 
+    as UTF-8, or true for no argument, for component entry points; 
+    a list of arguments for bound functions.  With tiered compilation,
+    .NET optimizes a method fully only after it is called 30 times.  
+    Relative assembly paths in a file are relative to its directory.
+    """
+
+    def __init__(self, entries: Iterable[ManifestEntry]):
+        self.entries = list(entries)
+
+    @classmethod
+    def from_dict(cls, manifest: dict, base_path: Optional[str] = None) -> 'EntryPointManifest':
+        default_assembly = manifest.get("assembly")
+        entries = []
+        for item in manifest.get("entry_points", ()):
+            assembly_path = item.get("assembly", default_assembly)
+            if assembly_path is None:
+                raise ValueError(f"No assembly given for entry point {item!r}")
+            if base_path is not None:
+                assembly_path = os.path.join(base_path, assembly_path)
+
+            name = item.get("name", item["method"])
+            delegate_name = item.get("delegate")
+            signature = item.get("signature")
+            warm_up = item.get("warm_up")
+            if warm_up is False:
+                warm_up = None
+
+            if signature is not None:
+                signature = tuple(signature)
+                if warm_up is not None:
+                    if not isinstance(warm_up, (list, tuple)):
+                        raise ValueError(f"warm_up for entry point {name!r} "
+                                         f"must be a list of arguments")
+                    warm_up = tuple(warm_up)
+            elif delegate_name is not None:
+                if warm_up is not None:
+                    raise ValueError(f"Entry point {name!r} has a delegate type but no "
+                                     f"signature to call it with, so it cannot be warmed up")
+            elif isinstance(warm_up, str):
+                warm_up = warm_up.encode('utf-8')
+            elif warm_up is True:
+                warm_up = b''
+            elif warm_up is not None and not isinstance(warm_up, (bytes, bytearray)):
+                raise ValueError(f"warm_up for entry point {name!r} must be a string or true")
+
+            entries.append(ManifestEntry(name,
+                                         assembly_path,
+                                         item["type"],
+                                         item["method"],
+                                         delegate_name,
+                                         signature,
+                                         warm_up,
+                                         item.get("warm_up_calls", 1)))
+        return cls(entries)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'EntryPointManifest':
+        """
+        Read a manifest from a JSON file, or a TOML file if its name
+        ends with ".toml".  Reading TOML requires Python 3.11, 
+        or the "tomli" package.
+        """
+        if path.endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:
+                import tomli as tomllib
+            with open(path, "rb") as f:
+                manifest = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        return cls.from_dict(manifest, os.path.dirname(os.path.abspath(path)))
+
+    @classmethod
+    def load(cls, manifest) -> 'EntryPointManifest':
+        """
+        Get a manifest from a mapping, a path to a file, or
+        a manifest, which is returned as is.
+        """
+        if isinstance(manifest, EntryPointManifest):
+            return manifest
+        if isinstance(manifest, (str, os.PathLike)):
+            return cls.from_file(os.fspath(manifest))
+        return cls.from_dict(manifest)
+
+
+class EntryPointTiming(NamedTuple):
+    name: str
+    resolve_seconds: float
+    warm_up_seconds: float
+
+
+class ResolvedManifest():
+    """
+    Entry points of an ``EntryPointManifest`` resolved by 
+    ``DotNetSession.resolve_manifest``, by name, with the time 
+    taken to resolve and warm up each.
+    """
+
+    def __init__(self):
+        self.entry_points = {}
+        self.timings = []
+
+    def __getitem__(self, name: str):
+        return self.entry_points[name]
+
+    def __contains__(self, name: str):
+        return name in self.entry_points
+
+    def __len__(self):
+        return len(self.entry_points)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(t.resolve_seconds + t.warm_up_seconds for t in self.timings)
+
+    def as_dict(self) -> dict:
+        return { t.name: { "resolve": t.resolve_seconds, "warm_up": t.warm_up_seconds } 
+                 for t in self.timings }
+
+
+def _get_runtime_properties(dll, handle: Optional[c_hostfxr_handle]) -> dict:
+    # Retrieve the properties into arrays of the size hostfxr reports
+    # as needed.  hostfxr also reports the arrays as too small whenever
+    # they are null, even with no properties, so they always have at
+    # least one element.
+    capacity = 1
+    while True:
+        count = ctypes.c_size_t(capacity)
+        keys_array = (c_tchar_p * capacity)()
+        values_array = (c_tchar_p * capacity)()
+        try:
+            dll.hostfxr_get_runtime_properties(handle, count, keys_array, values_array) 
+            break
+        except DotNetHostError as e:
+            if e.error_code != StatusCode.HostApiBufferTooSmall or count.value <= capacity:
+                raise
+            capacity = count.value
+
+    return { from_tstring(keys_array[i]): from_tstring(values_array[i]) \
+             for i in range(count.value) }
+
+def _property_value_to_str(value) -> Optional[str]:
+    # None is passed on as NULL, which makes hostfxr remove the property
+    if value is None:
+        return None
+    # .NET parses Boolean switches from "true" and "false"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class HostContext():
+    """
+    A "host context" from ``hostfxr``, shared by all ``DotNetSession``
+    objects in the process created with the same parameters.
+
+    Only one .NET run-time can be loaded in a process, and hostfxr
+    links every host context after the first one, called the primary
+    context, to it.  ``status`` records what hostfxr reported when 
+    initializing this context: ``StatusCode.Success`` for the primary
+    context, otherwise ``StatusCode.Success_HostAlreadyInitialized`` or
+    ``StatusCode.Success_DifferentRuntimeProperties``.  In the last 
+    case, ``property_conflicts`` maps the name of each run-time property
+    whose value requested for this context differs from the value 
+    in force, to the pair of (requested value, active value).
+    """
+
+    def __init__(self, key: tuple, dll, handle: c_hostfxr_handle, status: int):
+        self.key = key
+        self.dll = dll
+        self.handle = handle
+        self.status = status
+        self.property_conflicts = {}
+        self._ref_count = 1
+        self._properties = None
+
+    def get_properties(self) -> dict:
+        """
+        Get the run-time properties of this context.  They are retrieved 
+        from hostfxr once and cached until ``invalidate_properties`` is called.
+        """
+        properties = self._properties
+        if properties is None:
+            properties = _get_runtime_properties(self.dll, self.handle)
+            self._properties = properties
+        return properties
+
+    def invalidate_properties(self):
+        self._properties = None
+
+    def set_properties(self, properties: dict):
+        """
+        Set run-time properties, which is only possible on the 
+        primary context before the .NET run-time starts.
+        """
+        # hostfxr has no call to set more than one property at a time
+        f = self.dll.hostfxr_set_runtime_property_value
+        handle = self.handle
+        try:
+            for key, value in properties.items():
+                f(handle, to_tstring(key), to_tstring(_property_value_to_str(value)))
+        finally:
+            self._properties = None
+
+    @property
+    def is_primary(self) -> bool:
+        return self.status == StatusCode.Success
+
+
+class _HostContextRegistry():
+    """
+    Process-wide record of open host contexts, so that sessions 
+    can share them instead of initializing hostfxr again.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._contexts = {}
+        self._unstarted_primary = None
+        self._unstarted_primary_profile = None
+        self._load_assembly_and_get_function_pointer = None
+        self._first_load_claimed = False
+
+    def acquire(self,
+                dll,
+                dll_path: str,
+                config_path: Optional[str],
+                host_path: Optional[str],
+                dotnet_root: Optional[str],
+                config_overrides: Optional[dict] = None,
+                profile: Optional[StartupProfile] = None) -> HostContext:
+        overrides = { k: _property_value_to_str(v) for k, v in config_overrides.items() } \
+                        if config_overrides else {}
+
+        key = (dll_path, 
+               os.path.abspath(config_path) if config_path is not None else None, 
+               host_path, 
+               dotnet_root,
+               frozenset(overrides.items()))
+
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                context._ref_count += 1
+                return context
+
+            # hostfxr blocks initialization of a secondary context until 
+            # the run-time has been started through the primary context;
+            # within one thread that would never finish.  The time taken
+            # goes into the profile of the session that created the
+            # primary context.
+            primary = self._unstarted_primary
+            if primary is not None:
+                self.get_load_assembly_and_get_function_pointer(primary, 
+                                                                self._unstarted_primary_profile)
+
+            parameters = None
+            if host_path is not None or dotnet_root is not None:
+                parameters = hostfxr_initialize_parameters()
+                parameters.size = ctypes.sizeof(hostfxr_initialize_parameters)
+                if host_path is not None:
+                    parameters.host_path = to_tstring(host_path)
+                if dotnet_root is not None:
+                    parameters.dotnet_root = to_tstring(dotnet_root)
+
+            handle = c_hostfxr_handle()
+            try:
+                with _measure(profile, StartupProfile.INITIALIZE_FOR_RUNTIME_CONFIG):
+                    status = dll.hostfxr_initialize_for_runtime_config(
+                        to_tstring(config_path),
+                        parameters,
+                        handle
+                    )
+
+                context = HostContext(key, dll, handle, status)
+                if status == StatusCode.Success:
+                    context.set_properties(overrides)
+                else:
+                    # Properties can no longer be changed; report 
+                    # what could not be honored instead
+                    requested = _get_runtime_properties(dll, handle) \
+                        if status == StatusCode.Success_DifferentRuntimeProperties else {}
+                    requested.update(overrides)
+                    active = _get_runtime_properties(dll, None)
+                    context.property_conflicts = { 
+                        k: (v, active.get(k)) for k, v in requested.items() 
+                                              if active.get(k) != v }
+            except BaseException:
+                # An unclosed primary context would make hostfxr block
+                # every later initialization in the process
+                if handle:
+                    dll.hostfxr_close(handle)
+                raise
+
+            if status == StatusCode.Success:
+                self._unstarted_primary = context
+                self._unstarted_primary_profile = profile
+
+            self._contexts[key] = context
+            return context
+
+    def release(self, context: HostContext):
+        with self._lock:
+            context._ref_count -= 1
+            if context._ref_count > 0:
+                return
+
+            del self._contexts[context.key]
+            if self._unstarted_primary is context:
+                self._unstarted_primary = None
+                self._unstarted_primary_profile = None
+
+            handle = context.handle
+            context.handle = None
+            context.dll.hostfxr_close(handle)
+
+    def get_load_assembly_and_get_function_pointer(self, 
+                                                   context: HostContext,
+                                                   profile: Optional[StartupProfile] = None):
+        """
+        Get the .NET function to load assemblies, starting the run-time
+        if it has not been started yet.
+
+        The function is the same for every host context, 
+        so it is only requested from hostfxr once per process.
+        """
+        f = self._load_assembly_and_get_function_pointer
+        if f is not None:
+            return f
+
+        with self._lock:
+            f = self._load_assembly_and_get_function_pointer
+            if f is None:
+                f = ctypes.c_void_p()
+                with _measure(profile, StartupProfile.GET_RUNTIME_DELEGATE):
+                    context.dll.hostfxr_get_runtime_delegate( 
+                        context.handle, 
+                        hostfxr_delegate_type.hdt_load_assembly_and_get_function_pointer, 
+                        f) 
+                f = ctypes.cast(f, load_assembly_and_get_function_pointer_fn) 
+                self._load_assembly_and_get_function_pointer = f
+                self._unstarted_primary = None
+                self._unstarted_primary_profile = None
+            return f
+
+    def claim_first_load(self) -> bool:
+        """
+        Return True for only the first caller in the process, which 
+        is about to load the first assembly into the run-time.
+        """
+        if self._first_load_claimed:
+            return False
+        with self._lock:
+            if self._first_load_claimed:
+                return False
+            self._first_load_claimed = True
+            return True
+
+_g_host_contexts = _HostContextRegistry()
 
 
 class DotNetSession(): 
 
     @classmethod 
-    def _get_nethost_dll(cls):
+    def _get_nethost_dll_path(cls) -> str:
+        return os.path.join(os.path.dirname(__file__), nethost_platform, nethost_dll_name)
+
+    @classmethod 
+    def _get_nethost_dll(cls, profile: Optional[StartupProfile] = None):
         """
         Get the ctypes object for the "nethost" DLL.  This DLL
         discovers installations of .NET Core.
@@ -160,45 +1469,81 @@ class DotNetSession():
         nethost = _g_nethost 
 
         if nethost is None: 
-            nethost_dll_path = os.path.join(os.path.dirname(__file__), nethost_platform, nethost_dll_name)
-            nethost = windll.LoadLibrary(nethost_dll_path) 
+            with _measure(profile, StartupProfile.NETHOST_LOAD):
+                nethost = windll.LoadLibrary(DotNetSession._get_nethost_dll_path()) 
 
-        f = nethost.get_hostfxr_path 
-        f.errcheck = _c_int_error_check 
-        f.restype = ctypes.c_int 
-        f.argtypes = [ c_tchar_p, 
-                       ctypes.POINTER(ctypes.c_size_t), 
-                       ctypes.POINTER(get_hostfxr_parameters) ] 
+            f = nethost.get_hostfxr_path 
+            f.errcheck = _c_int_error_check 
+            f.restype = ctypes.c_int 
+            f.argtypes = [ c_tchar_p, 
+                           ctypes.POINTER(ctypes.c_size_t), 
+                           ctypes.POINTER(get_hostfxr_parameters) ] 
+
+            _g_nethost = nethost 
 
-        _g_nethost = nethost 
         return nethost 
 
     @classmethod 
-    def get_dll_path(cls) -> str:
+    def get_dll_path(cls, 
+                     discovery_cache: Optional[str] = None,
+                     profile: Optional[StartupProfile] = None) -> str:
         """
         Get the location of a "hostfxr" DLL for some installation
         of .NET Core.
 
-        This location is discovered using the "nethost" DLL.
+        This location is discovered using the "nethost" DLL, once per 
+        process.  If ``discovery_cache`` is the path to a file, or 
+        otherwise if the environment variable ``DOTNETPY_DISCOVERY_CACHE`` 
+        is, the result is also saved there for later processes.  A saved 
+        result is used without loading "nethost" as long as the directories 
+        it was found in have not been modified since.
         """
 
-        nethost = DotNetSession._get_nethost_dll() 
+        global _g_hostfxr_path
+        path = _g_hostfxr_path
+        if path is not None:
+            return path
 
-        pathBuf = create_tstring_buffer(4096) 
-        pathBufLen = ctypes.c_size_t(len(pathBuf)) 
+        if discovery_cache is None:
+            discovery_cache = os.environ.get("DOTNETPY_DISCOVERY_CACHE") or None
 
-        nethost.get_hostfxr_path(pathBuf, pathBufLen, None) 
-        return from_tstring(pathBuf)
+        cache_key = None
+        if discovery_cache is not None:
+            cache_key = "|".join((DotNetSession._get_nethost_dll_path(), 
+                                  os.environ.get("DOTNET_ROOT", "")))
+            with _measure(profile, StartupProfile.READ_DISCOVERY_CACHE):
+                path = _read_discovery_cache(discovery_cache, cache_key)
+
+        if path is None:
+            nethost = DotNetSession._get_nethost_dll(profile) 
+
+            with _measure(profile, StartupProfile.GET_HOSTFXR_PATH):
+                pathBuf = create_tstring_buffer(4096) 
+                pathBufLen = ctypes.c_size_t(len(pathBuf)) 
+
+                nethost.get_hostfxr_path(pathBuf, pathBufLen, None) 
+                path = from_tstring(pathBuf)
+
+            if discovery_cache is not None:
+                _write_discovery_cache(discovery_cache, cache_key, path)
+
+        _g_hostfxr_path = path
+        return path
 
     @classmethod
-    def _get_hostfxr_dll(cls, path: str):
+    def _get_hostfxr_dll(cls, path: str, profile: Optional[StartupProfile] = None):
+        hostfxr = _g_hostfxr_dlls.get(path)
+        if hostfxr is not None:
+            return hostfxr
+
         # hostfxr is cdecl even on Windows 
-        hostfxr = cdll.LoadLibrary(path) 
+        with _measure(profile, StartupProfile.HOSTFXR_LOAD):
+            hostfxr = cdll.LoadLibrary(path) 
  
         # See https://github.com/dotnet/runtime/blob/master/src/installer/corehost/cli/hostfxr.h 
  
         f = hostfxr.hostfxr_initialize_for_runtime_config 
-        f.errcheck = _c_int_error_check 
+        f.errcheck = _c_int_success_check 
         f.restype = ctypes.c_int 
         f.argtypes = [ c_tchar_p,                                       # runtime_config_path 
                        ctypes.POINTER(hostfxr_initialize_parameters), 
@@ -238,92 +1583,582 @@ class DotNetSession():
         f.restype = ctypes.c_int 
         f.argtypes = [ c_hostfxr_handle ] 
 
+        _g_hostfxr_dlls[path] = hostfxr
         return hostfxr
 
     def __init__(self, 
                  config_path: Optional[str] = None,
                  host_path: Optional[str] = None,
                  dotnet_root: Optional[str] = None,
-                 dll_path: Optional[str] = None):
+                 dll_path: Optional[str] = None,
+                 entry_point_cache_size: Optional[int] = 256,
+                 discovery_cache: Optional[str] = None,
+                 startup_callback: Optional[Callable[[str, float], None]] = None,
+                 config_overrides: Optional[dict] = None,
+                 manifest=None,
+                 metrics=None,
+                 tracer=None):
+
+        self._host_context = None
+        self.entry_point_cache = EntryPointCache(entry_point_cache_size)
+        self.callbacks = CallbackRegistry()
+        self.buffer_pool = BufferPool()
+        self.metrics = metrics
+        self.tracer = tracer
 
-        self._hostfxr_handle = None
+        profile = StartupProfile(startup_callback)
+        self.startup_profile = profile
+        if tracer is not None:
+            tracer.add_startup_profile(profile)
 
         if dll_path is None: 
-            dll_path = DotNetSession.get_dll_path() 
-
-        self._dll = DotNetSession._get_hostfxr_dll(dll_path)
-
-        parameters = None
-        if host_path is not None or dotnet_root is not None:
-            parameters = hostfxr_initialize_parameters()
-            parameters.size = ctypes.sizeof(hostfxr_initialize_parameters)
-            if host_path is not None:
-                parameters.host_path = create_tstring_buffer(host_path)
-            if dotnet_root is not None:
-                parameters.dotnet_root = create_tstring_buffer(dotnet_root)
-
-        handle = c_hostfxr_handle()
-        self._dll.hostfxr_initialize_for_runtime_config(
-            to_tstring(config_path),
-            parameters,
-            handle
-        )
-
-        self._hostfxr_handle = handle
+            dll_path = DotNetSession.get_dll_path(discovery_cache, profile) 
+
+        self._dll = DotNetSession._get_hostfxr_dll(dll_path, profile)
+
+        context = _g_host_contexts.acquire(self._dll, 
+                                           dll_path, 
+                                           config_path, 
+                                           host_path, 
+                                           dotnet_root,
+                                           config_overrides,
+                                           profile)
+        self._host_context = context
+        self._hostfxr_handle = context.handle
         self._load_assembly_and_get_function_pointer = None
 
+        # .NET type and method names of functions resolved, by address
+        self._function_names = {}
+
+        self.manifest = None
+        if manifest is not None:
+            self.manifest = self.resolve_manifest(manifest)
+
+    @classmethod
+    def start_background(cls, preload: Iterable = (), **kwargs) -> 'SessionStartup':
+        """
+        Create a session on a background thread, returning immediately.
+
+        The keyword arguments are those for constructing ``DotNetSession``.
+        After the session is created, the .NET run-time is started, and 
+        the entry points listed in ``preload`` are resolved into the 
+        session's entry point cache.  Each is a tuple of the assembly 
+        path, type name and method name, optionally followed by 
+        the delegate type name as for ``load_assembly_and_get_function_pointer``.
+        """
+        return SessionStartup(cls, list(preload), kwargs)
+
     def __del__(self):
-        handle = self._hostfxr_handle
-        if handle is not None:
-            self._hostfxr_handle = None
-            self._dll.hostfxr_close(handle)
+        context = self._host_context
+        if context is not None:
+            self._host_context = None
+            _g_host_contexts.release(context)
 
-    def load_assembly_and_get_function_pointer( 
-            self, 
-            assembly_path: str, 
-            type_name: str, 
-            method_name: str, 
-            delegate_name: Optional[str] = None): 
+    @property
+    def host_context(self) -> HostContext:
+        """
+        The hostfxr host context this session uses, possibly shared
+        with other sessions.
+        """
+        return self._host_context
 
-        delegate = ctypes.c_void_p() 
+    @property
+    def property_conflicts(self) -> dict:
+        """
+        Run-time properties requested by this session's configuration
+        whose values differ from those of the .NET run-time already
+        running in this process.
+        """
+        return self._host_context.property_conflicts
 
+    def _get_load_assembly_and_get_function_pointer(self):
         f = self._load_assembly_and_get_function_pointer
         if f is None:
-            f = ctypes.c_void_p()
-            self._dll.hostfxr_get_runtime_delegate( 
-                self._hostfxr_handle, 
-                hostfxr_delegate_type.hdt_load_assembly_and_get_function_pointer, 
-                f) 
-            f = ctypes.cast(f, load_assembly_and_get_function_pointer_fn) 
+            f = _g_host_contexts.get_load_assembly_and_get_function_pointer(
+                    self._host_context, self.startup_profile)
             self._load_assembly_and_get_function_pointer = f
+        return f
+
+    def warm_up_thread(self):
+        """
+        Attach the calling thread to the .NET run-time, starting the
+        run-time if necessary, by making a trivial call into managed code.
+
+        A thread is attached on its first call into managed code, which
+        is slower than subsequent calls; this gets that done ahead of time.
+        """
+        # With null arguments, the managed implementation of
+        # load_assembly_and_get_function_pointer only validates them 
+        # and returns E_POINTER
+        f = self._get_load_assembly_and_get_function_pointer()
+        f(None, None, None, None, None, None)
+
+    def _resolve_function_pointer(
+            self,
+            assembly_path: str, 
+            type_name: str, 
+            method_name: str, 
+            delegate_type) -> ctypes.c_void_p:
+        f = self._get_load_assembly_and_get_function_pointer()
+
+        # The first load into the run-time completes booting CoreCLR,
+        # and is only timed for the session that does it
+        profile = self.startup_profile if _g_host_contexts.claim_first_load() else None
 
         delegate = ctypes.c_void_p()
-        err = f(to_tstring(assembly_path), 
-                to_tstring(type_name), 
-                to_tstring(method_name), 
-                to_tstring(delegate_name), None, delegate) 
+        with _measure(profile, StartupProfile.FIRST_LOAD_ASSEMBLY):
+            err = f(to_tstring(assembly_path), 
+                    to_tstring(type_name), 
+                    to_tstring(method_name), 
+                    delegate_type, None, delegate) 
         if err < 0: 
             raise ValueError("load_assembly_and_get_function_pointer failed") 
 
+        self._function_names[delegate.value] = (type_name, method_name)
+        return delegate
+
+    def load_assembly_and_get_function_pointer( 
+            self, 
+            assembly_path: str, 
+            type_name: str, 
+            method_name: str, 
+            delegate_name: Optional[str] = None): 
+
+        delegate = self._get_function_pointer(assembly_path, type_name, method_name, delegate_name)
+        if delegate_name is None:
+            if self.metrics is not None:
+                delegate = self.metrics.instrument_function(delegate, type_name, method_name,
+                                                            component_entry_point=True)
+            if self.tracer is not None:
+                delegate = self.tracer.trace_function(delegate, type_name, method_name)
+        return delegate
+
+    def _get_function_pointer(
+            self, 
+            assembly_path: str, 
+            type_name: str, 
+            method_name: str, 
+            delegate_name: Optional[str]): 
+
+        key = (assembly_path, type_name, method_name, delegate_name)
+        delegate = self.entry_point_cache.get(key)
+        if delegate is not None:
+            return delegate
+
+        delegate = self._resolve_function_pointer(assembly_path, 
+                                                  type_name, 
+                                                  method_name, 
+                                                  to_tstring(delegate_name))
+
         if delegate_name is None: 
             delegate = ctypes.cast(delegate, component_entry_point_fn) 
 
+        self.entry_point_cache.put(key, delegate)
         return delegate 
 
+    def bind(
+            self,
+            assembly_path: str,
+            type_name: str,
+            method_name: str,
+            signature,
+            delegate_name: Optional[str] = None):
+        """
+        Get a .NET function as a ctypes function object with the 
+        given signature, ready to be called.
+
+        ``signature`` is a ctypes function pointer type, or a sequence of 
+        the return type followed by the argument types, as for 
+        ``ctypes.WINFUNCTYPE``.  The types may be ctypes types, NumPy 
+        scalar types, or names of types: C# keywords such as "int" and
+        "long", "IntPtr" or any name ending in "*" for pointers, 
+        or names of ctypes types like "c_int".  The function pointer 
+        type is created once per signature and shared by all bound 
+        functions.
+
+        If ``delegate_name`` is None, the .NET method must be marked
+        ``[UnmanagedCallersOnly]``, which requires .NET 5 or later.
+        Calls then go straight to the method without any delegate 
+        marshalling.  Otherwise ``delegate_name`` is the assembly-qualified 
+        name of a delegate type matching the signature.
+
+        If the session was created with ``CallMetrics`` or a 
+        ``CallTracer``, the ctypes function is wrapped to record its 
+        calls there, and is available as the ``function`` attribute 
+        of the wrapper.
+        """
+        prototype = get_function_prototype(signature)
+
+        key = (assembly_path, type_name, method_name, delegate_name, prototype)
+        function = self.entry_point_cache.get(key)
+        if function is None:
+            delegate_type = UNMANAGEDCALLERSONLY_METHOD if delegate_name is None \
+                                else to_tstring(delegate_name)
+            delegate = self._resolve_function_pointer(assembly_path, 
+                                                      type_name, 
+                                                      method_name, 
+                                                      delegate_type)
+
+            function = ctypes.cast(delegate, prototype)
+            self.entry_point_cache.put(key, function)
+
+        if self.metrics is not None:
+            function = self.metrics.instrument_function(function, type_name, method_name)
+        if self.tracer is not None:
+            function = self.tracer.trace_function(function, type_name, method_name)
+        return function
+
+    def get_entry_point(
+            self,
+            assembly_path: str,
+            type_name: str,
+            method_name: str) -> ComponentEntryPoint:
+        """
+        Get a .NET function with the default signature for component 
+        entry points, wrapped so that it can be called with any 
+        Python buffer object.  If the session was created with 
+        ``CallMetrics`` or a ``CallTracer``, the function records 
+        its calls there.
+        """
+        function = self._get_function_pointer(
+            assembly_path, type_name, method_name, None)
+        entry_point = ComponentEntryPoint(function, assembly_path, type_name, method_name)
+        if self.metrics is not None:
+            entry_point = self.metrics.instrument(entry_point)
+        if self.tracer is not None:
+            entry_point = self.tracer.trace(entry_point)
+        return entry_point
+
+    def resolve_manifest(self, manifest, warm_up: bool = True) -> ResolvedManifest:
+        """
+        Resolve all entry points of an ``EntryPointManifest``, given 
+        in any form accepted by ``EntryPointManifest.load``, and call
+        those with a warm-up argument unless ``warm_up`` is false.
+        If a session is created with a manifest, it is resolved here 
+        and the result kept in the session's ``manifest`` attribute.
+        """
+        resolved = ResolvedManifest()
+        for entry in EntryPointManifest.load(manifest).entries:
+            start = time.perf_counter()
+            if entry.signature is not None:
+                function = self.bind(entry.assembly_path, 
+                                     entry.type_name, 
+                                     entry.method_name, 
+                                     entry.signature, 
+                                     entry.delegate_name)
+            elif entry.delegate_name is not None:
+                function = self.load_assembly_and_get_function_pointer(entry.assembly_path, 
+                                                                       entry.type_name, 
+                                                                       entry.method_name, 
+                                                                       entry.delegate_name)
+            else:
+                function = self.get_entry_point(entry.assembly_path, 
+                                                entry.type_name, 
+                                                entry.method_name)
+            resolved_at = time.perf_counter()
+
+            if warm_up and entry.warm_up is not None:
+                for _ in range(entry.warm_up_calls):
+                    if entry.signature is not None:
+                        function(*entry.warm_up)
+                    elif entry.delegate_name is None:
+                        function(entry.warm_up or None)
+
+            finished_at = time.perf_counter()
+            resolved.entry_points[entry.name] = function
+            resolved.timings.append(EntryPointTiming(entry.name, 
+                                                     resolved_at - start, 
+                                                     finished_at - resolved_at))
+        return resolved
+
+    def _get_function_name(self, delegate) -> tuple:
+        """
+        Get the .NET type and method name of a ``ComponentEntryPoint``,
+        or of a raw function that was resolved through this session;
+        they are "?" for other functions.
+        """
+        type_name = getattr(delegate, 'type_name', None)
+        if type_name is not None:
+            return (type_name, delegate.method_name)
+
+        try:
+            address = ctypes.cast(getattr(delegate, 'function', delegate), ctypes.c_void_p).value
+        except (ctypes.ArgumentError, TypeError):
+            address = None
+        return self._function_names.get(address, ('?', '?'))
+
+    def _begin_call(self, frame, delegate, operation: str, length: int) -> Optional[tuple]:
+        # Start recording a call made by call_batch, call_async or stream
+        # in the session's CallMetrics and CallTracer, if any
+        tracer = self.tracer
+        if tracer is not None and not tracer.enabled:
+            tracer = None
+        metrics = self.metrics
+        if tracer is None and metrics is None:
+            return None
+
+        names = self._get_function_name(delegate)
+        stack = tracer.capture_stack(frame) if tracer is not None else None
+        return (tracer, metrics, names, operation, length, stack, time.perf_counter_ns())
+
+    @staticmethod
+    def _end_call(call: Optional[tuple], status, error: bool):
+        if call is not None:
+            tracer, metrics, names, operation, length, stack, start = call
+            if metrics is not None:
+                metrics._record(names, error, length, time.perf_counter_ns() - start)
+            if tracer is not None:
+                type_name, method_name = names
+                tracer.record(f"{type_name}::{method_name} [{operation}]", start, status, stack)
+
+    def call_batch(self, delegate, payloads: Iterable) -> array.array:
+        """
+        Pass many payloads to a batch-aware .NET function in one call,
+        to amortize the cost of transitioning between Python and .NET.
+
+        ``delegate`` is a ``ComponentEntryPoint`` or a raw
+        ``component_entry_point_fn``.  The payloads, which may be any 
+        objects implementing the buffer protocol, are packed into one 
+        contiguous arena described by a ``batch_descriptor``.  
+        The status codes set by the .NET function for each payload 
+        are returned as an array of ints.
+
+        The item table, status codes and arena are laid out in one
+        buffer from ``buffer_pool``, so repeated batches do not
+        allocate native memory.
+        """
+        function = getattr(delegate, 'function', delegate)
+
+        views = [ memoryview(p).cast('B') for p in payloads ]
+        count = len(views)
+        if count == 0:
+            return array.array('i')
+
+        statuses_offset = 16 * count
+        arena_offset = (statuses_offset + 4 * count + 7) & ~7
+        arena_size = sum(view.nbytes for view in views)
+
+        with self.buffer_pool.acquire(arena_offset + arena_size) as buffer:
+            memory = buffer.view
+            items = memory[:statuses_offset].cast('q')
+            offset = 0
+            position = arena_offset
+            for i, view in enumerate(views):
+                length = view.nbytes
+                items[2*i] = offset
+                items[2*i+1] = length
+                memory[position : position + length] = view
+                offset += length
+                position += length
+            items.release()
+
+            address = buffer.address
+            batch = batch_descriptor(count, 0, 
+                                     address + arena_offset,
+                                     address,
+                                     address + statuses_offset)
+            call = self._begin_call(sys._getframe(1), delegate, "call_batch", arena_size)
+            err = None
+            try:
+                err = function(ctypes.addressof(batch), ctypes.sizeof(batch))
+            finally:
+                DotNetSession._end_call(call, err, err is None or err < 0)
+
+            statuses = array.array('i')
+            statuses.frombytes(memory[statuses_offset : statuses_offset + 4 * count])
+            memory.release()
+
+        if err < 0:
+            raise DotNetHostError(err, "Batch call failed")
+
+        return statuses
+
+    def call_async(self, delegate, arg=None) -> asyncio.Future:
+        """
+        Call a .NET function that completes asynchronously,
+        without blocking the event loop while the work is being done.
+
+        ``delegate`` is a ``ComponentEntryPoint`` or a raw
+        ``component_entry_point_fn``, which receives an
+        ``async_call_descriptor`` describing ``arg`` and the
+        completion callback.  ``arg`` may be any object implementing
+        the buffer protocol, and is kept pinned until .NET signals
+        completion, even if the awaiting task is cancelled.
+
+        The .NET function is started, and any error in the arguments
+        raised, before this method returns.  It returns a future of
+        the event loop, to be awaited for the status reported by .NET.
+        """
+        function = getattr(delegate, 'function', delegate)
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        pinned, address, length = _get_argument_pointer(arg)
+
+        token = next(_g_async_tokens)
+        descriptor = async_call_descriptor(
+            ctypes.cast(_async_completion, ctypes.c_void_p),
+            token,
+            address,
+            length)
+
+        _g_async_calls[token] = (loop, future, pinned)
+        call = self._begin_call(sys._getframe(1), delegate, "call_async", length)
+        try:
+            err = function(ctypes.addressof(descriptor), ctypes.sizeof(descriptor))
+        except BaseException:
+            _abandon_async_call(token)
+            DotNetSession._end_call(call, None, True)
+            raise
+
+        if err < 0:
+            _abandon_async_call(token)
+            DotNetSession._end_call(call, err, True)
+            raise DotNetHostError(err, "Asynchronous call failed to start")
+
+        if call is not None:
+            # The call is recorded once .NET signals completion
+            def end_call(f: asyncio.Future):
+                status = f.result() if not f.cancelled() else None
+                DotNetSession._end_call(call, status, status != 0)
+            future.add_done_callback(end_call)
+
+        return future
+
+    def stream(self, 
+               delegate, 
+               request=None, 
+               chunk_size: int = 1 << 20, 
+               chunk_count: int = 4) -> Iterator[memoryview]:
+        """
+        Call a .NET function that produces its results incrementally,
+        yielding them as they are produced, with bounded memory.
+
+        ``delegate`` is a ``ComponentEntryPoint`` or a raw 
+        ``component_entry_point_fn``, which receives a 
+        ``stream_descriptor``.  ``request`` may be any object 
+        implementing the buffer protocol.  The .NET function runs on 
+        a separate thread and fills a fixed set of ``chunk_count`` 
+        buffers of ``chunk_size`` bytes, which are reused: when all of 
+        them are waiting to be consumed, .NET blocks until the 
+        generator advances.
+
+        Each memoryview yielded is only valid until the generator
+        is resumed, after which its chunk is handed back to .NET.
+        Copy the data out if it is needed for longer.
+
+        The arguments are checked, and ``request`` pinned, when this 
+        method is called; the .NET function is only started once the 
+        generator is first advanced.
+        """
+        if chunk_count < 1:
+            raise ValueError("chunk_count must be at least 1")
+        if chunk_size < 1 or chunk_size > _MAX_ARG_SIZE:
+            raise ValueError("chunk_size is out of range")
+
+        function = getattr(delegate, 'function', delegate)
+        pinned, address, length = _get_argument_pointer(request)
+
+        storage = [ (ctypes.c_char * chunk_size)() for _ in range(chunk_count) ]
+        chunks = (ctypes.c_void_p * chunk_count)(*[ ctypes.addressof(c) for c in storage ])
+
+        descriptor = stream_descriptor(None,
+                                       address,
+                                       ctypes.addressof(chunks),
+                                       length,
+                                       chunk_size,
+                                       chunk_count)
+
+        call = self._begin_call(sys._getframe(1), delegate, "stream", length)
+        return DotNetSession._generate_stream(function, pinned, descriptor, storage, chunks,
+                                              call)
+
+    @staticmethod
+    def _generate_stream(function, 
+                         pinned: Optional[_PinnedBuffer], 
+                         descriptor: stream_descriptor, 
+                         storage: list, 
+                         chunks,
+                         call: Optional[tuple]) -> Iterator[memoryview]:
+        chunk_count = len(storage)
+        if call is not None:
+            # Time from when the .NET function starts, not when the stream was set up
+            call = call[:-1] + (time.perf_counter_ns(),)
+
+        filled = queue.SimpleQueue()
+        free = queue.SimpleQueue()
+        for i in range(1, chunk_count):
+            free.put(i)
+
+        def emit(index: int, length: int) -> int:
+            filled.put((index, length))
+            return free.get()
+
+        emit_function = stream_emit_fn(emit)
+        descriptor.emit = ctypes.cast(emit_function, ctypes.c_void_p)
+
+        def produce():
+            try:
+                status = function(ctypes.addressof(descriptor), ctypes.sizeof(descriptor))
+                filled.put((None, status))
+            except BaseException as e:
+                filled.put((None, e))
+            finally:
+                if pinned is not None:
+                    pinned.release()
+
+        producer = threading.Thread(target=produce, name="DotNetSession.stream", daemon=True)
+        producer.start()
+
+        finished = False
+        status = None
+        error = False
+        try:
+            while True:
+                index, result = filled.get()
+                if index is None:
+                    finished = True
+                    if isinstance(result, BaseException):
+                        error = True
+                        raise result
+                    status = result
+                    if result < 0:
+                        error = True
+                        raise DotNetHostError(result, "Streaming call failed")
+                    return
+
+                view = memoryview(storage[index]).cast('B')[:result]
+                try:
+                    yield view
+                finally:
+                    view.release()
+                    free.put(index)
+        finally:
+            if not finished:
+                # Tell .NET to stop, then wait for it to let go of the chunks
+                for _ in range(chunk_count):
+                    free.put(-1)
+                producer.join()
+            DotNetSession._end_call(call, status, error)
+
+    @property
+    def runtime_properties(self) -> dict:
+        """
+        Snapshot of the run-time properties as a dictionary.
+
+        The snapshot is cached, and refreshed after properties 
+        are set through any session.  It must not be modified.
+        """
+        return self._host_context.get_properties()
+
     def get_runtime_properties(self): 
-        capacity = 4096 
-        keys_array = (c_tchar_p * capacity)() 
-        values_array = (c_tchar_p * capacity)() 
-        count = ctypes.c_size_t(capacity) 
-        self._dll.hostfxr_get_runtime_properties(self._hostfxr_handle, 
-                                                 count, 
-                                                 keys_array, 
-                                                 values_array) 
-
-        return [ (from_tstring(keys_array[i]), from_tstring(values_array[i])) \
-                 for i in range(count.value) ]
+        return list(self.runtime_properties.items())
 
     def get_runtime_property_value(self, key: str):
+        value = self.runtime_properties.get(key)
+        if value is not None:
+            return value
+
         value = c_tchar_p()
         self._dll.hostfxr_get_runtime_property_value(self._hostfxr_handle, 
                                                      to_tstring(key),
@@ -331,6 +2166,93 @@ class DotNetSession():
         return from_tstring(value)
 
     def set_runtime_property_value(self, key: str, value: str):
-        self._dll.hostfxr_set_runtime_property_value(self._hostfxr_handle, 
-                                                     to_tstring(key),
-                                                     to_tstring(value))
+        self._host_context.set_properties({ key: value })
+
+    def set_runtime_properties(self, properties: dict):
+        """
+        Set many run-time properties at once.
+
+        Values that are not strings are converted, with booleans 
+        becoming "true" or "false" as .NET expects.  A value of None 
+        removes the property.  Properties can only be set before the 
+        .NET run-time starts.
+        """
+        self._host_context.set_properties(properties)
+
+
+class SessionStartup():
+    """
+    Handle to a ``DotNetSession`` being created in the background by 
+    ``DotNetSession.start_background``.
+
+    Attributes of the session may be accessed through the handle,
+    which blocks until the session is ready, and re-raises the
+    exception if starting it failed.  ``state`` can be checked without 
+    blocking, e.g. to report readiness in health checks.
+    """
+
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, session_type: type, preload: list, kwargs: dict):
+        self._session = None
+        self._preload = preload
+        self.error = None
+        self.state = SessionStartup.WARMING
+        self.startup_seconds = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        args=(session_type, kwargs),
+                                        name="DotNetSession.start_background",
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self, session_type: type, kwargs: dict):
+        start = time.perf_counter()
+        try:
+            session = session_type(**kwargs)
+            session._get_load_assembly_and_get_function_pointer()
+            for entry in self._preload:
+                session.load_assembly_and_get_function_pointer(*entry)
+            self._session = session
+            self.state = SessionStartup.READY
+        except BaseException as e:
+            self.error = e
+            self.state = SessionStartup.FAILED
+        finally:
+            self.startup_seconds = time.perf_counter() - start
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == SessionStartup.READY
+
+    @property
+    def failed(self) -> bool:
+        return self.state == SessionStartup.FAILED
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for starting to finish, successfully or not.
+        Returns False if the timeout expires first.
+        """
+        return self._done.wait(timeout)
+
+    @property
+    def session(self) -> DotNetSession:
+        """
+        The session, waiting for it to be ready if necessary.
+        """
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self._session
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.session, name)
+
+    def __repr__(self):
+        return f"<SessionStartup {self.state}>"
@@ -0,0 +1,191 @@
+import concurrent.futures
+import itertools
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from ._dotnetpy import DotNetSession
+
+
+class WorkerStats(NamedTuple):
+    """
+    Snapshot of the activity of one worker thread of ``DotNetExecutor``.
+    """
+    name: str
+    calls: int
+    busy_seconds: float
+    utilization: float      # fraction of the worker's lifetime spent busy
+
+
+class _Worker():
+
+    def __init__(self, executor: 'DotNetExecutor', name: str):
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self.started = time.perf_counter()
+        self.ready = threading.Event()
+        self.warm_up_error = None
+        self.thread = threading.Thread(target=self._run,
+                                       args=(executor._work_queue, executor._warm_up),
+                                       name=name,
+                                       daemon=True)
+
+    def _run(self, work_queue: queue.SimpleQueue, warm_up: Optional[Callable]):
+        # Attaching a thread to the .NET run-time happens on its first
+        # call into managed code, so get that out of the way before
+        # accepting real work.
+        try:
+            if warm_up is not None:
+                warm_up()
+        except BaseException as e:
+            self.warm_up_error = e
+        finally:
+            self.ready.set()
+
+        while True:
+            item = work_queue.get()
+            if item is None:
+                return
+
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                self.busy_seconds += time.perf_counter() - start
+                self.calls += 1
+
+            # Do not keep the arguments alive while waiting for the next item
+            del item, future, fn, args, kwargs
+
+
+def _call_chunk(fn: Callable, chunk: List[tuple]) -> list:
+    return [ fn(*args) for args in chunk ]
+
+
+class DotNetExecutor(concurrent.futures.Executor):
+    """
+    Executes calls into .NET on a fixed pool of threads.
+
+    ctypes releases the GIL while a foreign function is running,
+    so calls into .NET submitted here can run in parallel on multiple
+    CPU cores.  The worker threads are started eagerly, and each one
+    first calls ``warm_up``, so the cost of attaching the thread to the
+    .NET run-time is not paid by the first real call.  By default that 
+    is ``session.warm_up_thread``; it may instead be, for instance, a
+    ``ComponentEntryPoint`` to get the .NET code itself jitted.
+    """
+
+    def __init__(self,
+                 session: DotNetSession,
+                 max_workers: Optional[int] = None,
+                 warm_up: Optional[Callable] = None,
+                 thread_name_prefix: str = "DotNetExecutor"):
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        self.session = session
+        self._warm_up = warm_up if warm_up is not None else session.warm_up_thread
+        self._work_queue = queue.SimpleQueue()
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+
+        self._workers = [ _Worker(self, f"{thread_name_prefix}_{i}")
+                          for i in range(max_workers) ]
+        for worker in self._workers:
+            worker.thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+
+            future = concurrent.futures.Future()
+            self._work_queue.put((future, fn, args, kwargs))
+            return future
+
+    def map(self, fn: Callable, *iterables, timeout: Optional[float] = None, chunksize: int = 1):
+        """
+        Like ``Executor.map``, but when ``chunksize`` is greater than 1,
+        the arguments are submitted in chunks of that many calls, to cut
+        down on the overhead of dispatching to the worker threads.
+        """
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+        if chunksize == 1:
+            return super().map(fn, *iterables, timeout=timeout)
+
+        arguments = zip(*iterables)
+        chunks = iter(lambda: list(itertools.islice(arguments, chunksize)), [])
+        results = super().map(_call_chunk, itertools.repeat(fn), chunks, timeout=timeout)
+        return itertools.chain.from_iterable(results)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._shutdown_lock:
+            self._shutdown = True
+
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._work_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+
+            for _ in self._workers:
+                self._work_queue.put(None)
+
+        if wait:
+            for worker in self._workers:
+                worker.thread.join()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all worker threads to finish warming up.
+
+        Returns False if the timeout expires first.  If warming up
+        failed on any thread, the exception is re-raised here.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self._workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not worker.ready.wait(remaining):
+                return False
+            if worker.warm_up_error is not None:
+                raise worker.warm_up_error
+        return True
+
+    @property
+    def max_workers(self) -> int:
+        return len(self._workers)
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of submitted calls that are waiting for a worker thread.
+        """
+        return self._work_queue.qsize()
+
+    def worker_stats(self) -> List[WorkerStats]:
+        now = time.perf_counter()
+        stats = []
+        for worker in self._workers:
+            busy_seconds = worker.busy_seconds
+            lifetime = now - worker.started
+            stats.append(WorkerStats(worker.thread.name,
+                                     worker.calls,
+                                     busy_seconds,
+                                     busy_seconds / lifetime if lifetime > 0 else 0.0))
+        return stats
@@ -0,0 +1,249 @@
+import bisect
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+from ._dotnetpy import ComponentEntryPoint, _get_argument_pointer
+
+# Upper bounds of the buckets of the latency histogram, in seconds
+DEFAULT_LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5,
+                           1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                           1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Positions in the list of counters kept for each entry point by each thread;
+# the counts for each bucket of the histogram follow
+_CALLS = 0
+_ERRORS = 1
+_BYTES = 2
+_NANOSECONDS = 3
+_BUCKETS = 4
+
+
+class EntryPointMetrics(NamedTuple):
+    """
+    Snapshot of the metrics recorded for one .NET entry point.
+    """
+    type_name: str
+    method_name: str
+    calls: int
+    errors: int                 # calls returning non-zero or raising an exception
+    bytes: int                  # total of argSize over all calls
+    total_seconds: float
+    bucket_counts: tuple        # calls per bucket of CallMetrics.buckets, then above the last
+
+
+class InstrumentedEntryPoint(ComponentEntryPoint):
+    """
+    ``ComponentEntryPoint`` that records its calls in ``CallMetrics``.
+    """
+
+    def __init__(self, entry_point: ComponentEntryPoint, metrics: 'CallMetrics'):
+        super().__init__(entry_point.function,
+                         entry_point.assembly_path,
+                         entry_point.type_name,
+                         entry_point.method_name)
+        self.metrics = metrics
+        self._key = (entry_point.type_name, entry_point.method_name)
+
+    def __call__(self, arg=None) -> int:
+        function = self.function
+        metrics = self.metrics
+        start = time.perf_counter_ns()
+        status = -1
+        length = 0
+        pinned = None
+        try:
+            pinned, address, length = _get_argument_pointer(arg)
+            status = function(address, length)
+            return status
+        finally:
+            if pinned is not None:
+                pinned.release()
+            metrics._record(self._key, status != 0, length, time.perf_counter_ns() - start)
+
+    def __repr__(self):
+        return f"<InstrumentedEntryPoint {self.type_name}::{self.method_name}>"
+
+
+class InstrumentedFunction():
+    """
+    Wraps a ctypes function for a .NET method, as obtained from 
+    ``DotNetSession.bind`` or ``load_assembly_and_get_function_pointer``, 
+    to record its calls in ``CallMetrics``.  The ctypes function itself 
+    is available as ``function``, to pass to native code.
+
+    Calls raising an exception count as errors.  For functions with 
+    the signature of component entry points, so do calls returning 
+    non-zero, and argSize is counted as the bytes passed.
+    """
+
+    def __init__(self, 
+                 function, 
+                 metrics: 'CallMetrics', 
+                 type_name: str, 
+                 method_name: str,
+                 component_entry_point: bool = False):
+        self.function = function
+        self.metrics = metrics
+        self.type_name = type_name
+        self.method_name = method_name
+        self.component_entry_point = component_entry_point
+        self._key = (type_name, method_name)
+
+    def __call__(self, *args):
+        start = time.perf_counter_ns()
+        error = True
+        try:
+            result = self.function(*args)
+            error = self.component_entry_point and result != 0
+            return result
+        finally:
+            length = 0
+            if self.component_entry_point and len(args) == 2 and isinstance(args[1], int):
+                length = args[1]
+            self.metrics._record(self._key, error, length, time.perf_counter_ns() - start)
+
+    def __repr__(self):
+        return f"<InstrumentedFunction {self.type_name}::{self.method_name}>"
+
+
+class CallMetrics():
+    """
+    Counts calls, errors, bytes passed and latencies of .NET entry
+    points, per type and method name.
+
+    Each thread updates its own counters without locking; they are
+    only added together when a snapshot is taken, so the numbers may
+    lag slightly behind calls still in progress on other threads.
+    Pass an instance as the ``metrics`` argument of ``DotNetSession``
+    to instrument the entry points and functions it returns from 
+    ``get_entry_point``, ``bind`` and, for component entry points, 
+    ``load_assembly_and_get_function_pointer``, as well as its
+    ``call_batch``, ``call_async`` and ``stream``, the same calls as
+    are traced by ``CallTracer``.  Entry points obtained otherwise 
+    can be wrapped with ``instrument``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._bucket_bounds_ns = [ int(b * 1e9) for b in self.buckets ]
+        self._local = threading.local()
+        self._all_counters = []
+        self._lock = threading.Lock()
+
+    def instrument(self, entry_point: ComponentEntryPoint) -> InstrumentedEntryPoint:
+        if isinstance(entry_point, InstrumentedEntryPoint) and entry_point.metrics is self:
+            return entry_point
+        return InstrumentedEntryPoint(entry_point, self)
+
+    def instrument_function(self, 
+                            function, 
+                            type_name: str, 
+                            method_name: str, 
+                            component_entry_point: bool = False) -> InstrumentedFunction:
+        return InstrumentedFunction(function, self, type_name, method_name, component_entry_point)
+
+    def _get_thread_counters(self) -> dict:
+        counters = getattr(self._local, 'counters', None)
+        if counters is None:
+            counters = self._local.counters = {}
+            with self._lock:
+                self._all_counters.append(counters)
+        return counters
+
+    def _record(self, key: tuple, error: bool, length: int, nanoseconds: int):
+        try:
+            counters = self._local.counters
+        except AttributeError:
+            counters = self._get_thread_counters()
+
+        c = counters.get(key)
+        if c is None:
+            c = counters[key] = [ 0 ] * (_BUCKETS + len(self.buckets) + 1)
+
+        c[_CALLS] += 1
+        if error:
+            c[_ERRORS] += 1
+        c[_BYTES] += length
+        c[_NANOSECONDS] += nanoseconds
+        c[_BUCKETS + bisect.bisect_left(self._bucket_bounds_ns, nanoseconds)] += 1
+
+    def snapshot(self) -> List[EntryPointMetrics]:
+        """
+        Add up the counters of all threads, for each entry point.
+        """
+        with self._lock:
+            all_counters = list(self._all_counters)
+
+        totals = {}
+        for counters in all_counters:
+            for key, c in list(counters.items()):
+                c = list(c)
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = c
+                else:
+                    for i, value in enumerate(c):
+                        total[i] += value
+
+        return [ EntryPointMetrics(type_name,
+                                   method_name,
+                                   c[_CALLS],
+                                   c[_ERRORS],
+                                   c[_BYTES],
+                                   c[_NANOSECONDS] / 1e9,
+                                   tuple(c[_BUCKETS:]))
+                 for (type_name, method_name), c in sorted(totals.items(), key=lambda item: str(item[0])) ]
+
+    def reset(self):
+        """
+        Set all counters back to zero.
+        """
+        with self._lock:
+            for counters in self._all_counters:
+                for c in counters.values():
+                    for i in range(len(c)):
+                        c[i] = 0
+
+    def to_prometheus(self, prefix: str = "dotnetpy") -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def counter(name: str, help: str, field: str):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for m in snapshot:
+                lines.append(f"{prefix}_{name}{{{_labels(m)}}} {getattr(m, field)}")
+
+        counter("calls_total", "Calls into .NET entry points.", "calls")
+        counter("call_errors_total", "Calls into .NET entry points that returned non-zero or raised.", "errors")
+        counter("call_bytes_total", "Bytes passed to .NET entry points.", "bytes")
+
+        name = f"{prefix}_call_duration_seconds"
+        lines.append(f"# HELP {name} Latency of calls into .NET entry points.")
+        lines.append(f"# TYPE {name} histogram")
+        for m in snapshot:
+            labels = _labels(m)
+            cumulative = 0
+            for bound, count in zip(self.buckets, m.bucket_counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound!r}"}} {cumulative}')
+            # Counted from the buckets to stay consistent with them
+            # even if a call was being recorded during the snapshot
+            count = sum(m.bucket_counts)
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {m.total_seconds!r}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _escape_label(value: Optional[str]) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(m: EntryPointMetrics) -> str:
+    return f'type="{_escape_label(m.type_name)}",method="{_escape_label(m.method_name)}"'
@@ -0,0 +1,443 @@
+import collections
+import concurrent.futures
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import threading
+from typing import List, Optional
+
+from ._dotnetpy import DotNetSession
+
+
+class WorkerCrashedError(RuntimeError):
+    """
+    Raised for a call on ``DotNetProcessPool`` whose worker process
+    exited before completing it.
+    """
+    pass
+
+
+def _portable_exception(e: BaseException) -> BaseException:
+    # The exception is pickled to be sent to the parent process
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(repr(e))
+
+
+def _worker_main(conn, session_args: dict, default_assembly_path: Optional[str]):
+    """
+    Entry point of a worker process of ``DotNetProcessPool``.
+
+    Requests arrive on ``conn`` as (id, assembly path, type name,
+    method name, payload length, shared memory name).  The payload
+    is in the shared memory block, which is passed to the .NET
+    function in place.  The shared memory name is only sent when
+    the parent has switched the worker to a different block.
+
+    Before any request, the worker reports whether it could start
+    .NET, by sending (None, None, None), or (None, None, exception).
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        session = DotNetSession(**session_args)
+    except BaseException as e:
+        conn.send((None, None, _portable_exception(e)))
+        return
+    conn.send((None, None, None))
+
+    slot = None
+    slot_view = None
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            if request is None:
+                return
+
+            request_id, assembly_path, type_name, method_name, length, slot_name = request
+            try:
+                if slot_name is not None:
+                    if slot is not None:
+                        slot_view.release()
+                        slot.close()
+                    slot = shared_memory.SharedMemory(slot_name)
+                    slot_view = slot.buf
+
+                entry_point = session.get_entry_point(assembly_path or default_assembly_path,
+                                                      type_name,
+                                                      method_name)
+                if length == 0:
+                    status = entry_point()
+                else:
+                    with slot_view[:length] as payload:
+                        status = entry_point(payload)
+            except BaseException as e:
+                conn.send((request_id, None, _portable_exception(e)))
+            else:
+                conn.send((request_id, status, None))
+    finally:
+        if slot is not None:
+            slot_view.release()
+            slot.close()
+
+
+class _Task():
+
+    __slots__ = ('future', 'assembly_path', 'type_name', 'method_name', 'payload', 'readback')
+
+    def __init__(self, future, assembly_path, type_name, method_name, payload, readback):
+        self.future = future
+        self.assembly_path = assembly_path
+        self.type_name = type_name
+        self.method_name = method_name
+        self.payload = payload
+        self.readback = readback
+
+
+class _WorkerProcess():
+
+    def __init__(self, pool: 'DotNetProcessPool', index: int):
+        self.index = index
+        self.alive = True
+        self.ready = False
+        self.calls = 0
+        self.task = None
+        self.task_length = 0
+        self.slot = None
+        self.slot_changed = False
+
+        parent_conn, child_conn = pool._context.Pipe()
+        self.conn = parent_conn
+        self.process = pool._context.Process(
+            target=_worker_main,
+            args=(child_conn, pool._session_args, pool._assembly_path),
+            name=f"{pool._name_prefix}_{index}",
+            daemon=True)
+        self.process.start()
+        # Only the child holds the other end now, so its exit is seen as EOF
+        child_conn.close()
+
+        self.ensure_slot(pool._slot_size)
+
+    def ensure_slot(self, size: int):
+        if self.slot is not None and self.slot.size >= size:
+            return
+        # Imported here as it needs Python 3.8, unlike the rest of dotnetpy
+        from multiprocessing import shared_memory
+        self.release_slot()
+        self.slot = shared_memory.SharedMemory(create=True, size=size)
+        self.slot_changed = True
+
+    def release_slot(self):
+        slot = self.slot
+        if slot is not None:
+            self.slot = None
+            slot.close()
+            slot.unlink()
+
+    def send(self, task: _Task):
+        payload = task.payload
+        length = 0
+        if payload is not None:
+            view = memoryview(payload).cast('B')
+            length = view.nbytes
+            self.ensure_slot(max(length, 1))
+            self.slot.buf[:length] = view
+            view.release()
+            task.payload = None
+
+        slot_name = None
+        if self.slot_changed:
+            slot_name = self.slot.name
+            self.slot_changed = False
+
+        self.task = task
+        self.task_length = length
+        self.conn.send((id(task), task.assembly_path, task.type_name, task.method_name,
+                        length, slot_name))
+
+
+class DotNetProcessPool():
+    """
+    Runs calls into .NET in a pool of worker processes, each hosting
+    its own .NET run-time through a ``DotNetSession``.
+
+    A process can only host one .NET run-time, and garbage collection
+    and crashes in managed code affect the whole Python process with
+    it.  Worker processes each have their own GC heap and scale across
+    CPU cores without contending for the GIL of the parent.
+
+    Payloads are copied into a block of shared memory owned by the
+    worker, which passes it to the .NET function in place, so they are
+    never pickled.  Calls are dispatched to idle workers in the order
+    submitted.  A worker that exits while running a call is restarted;
+    the call fails with ``WorkerCrashedError``.  Workers are not
+    restarted if one exits before it has started .NET, or if workers
+    exit ``max_consecutive_crashes`` times without any call completing
+    in between; the pool is then broken, and all calls not yet 
+    completed, or submitted later, fail.
+
+    Worker processes are started with the "spawn" method, so scripts
+    creating the pool must guard their top-level code with
+    ``if __name__ == '__main__'``.  The pool needs Python 3.8 or later,
+    for ``multiprocessing.shared_memory``.
+
+    The arguments for hosting .NET are passed on to ``DotNetSession``
+    in each worker, along with any others in ``session_kwargs``, 
+    which must be picklable.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 assembly_path: Optional[str] = None,
+                 config_path: Optional[str] = None,
+                 host_path: Optional[str] = None,
+                 dotnet_root: Optional[str] = None,
+                 dll_path: Optional[str] = None,
+                 config_overrides: Optional[dict] = None,
+                 slot_size: int = 1 << 20,
+                 name_prefix: str = "DotNetProcessPool",
+                 session_kwargs: Optional[dict] = None,
+                 max_consecutive_crashes: int = 5):
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        self._context = multiprocessing.get_context('spawn')
+        self._assembly_path = assembly_path
+        self._session_args = dict(session_kwargs or {},
+                                  config_path=config_path,
+                                  host_path=host_path,
+                                  dotnet_root=dotnet_root,
+                                  dll_path=dll_path,
+                                  config_overrides=config_overrides)
+        self._slot_size = slot_size
+        self._name_prefix = name_prefix
+        self._max_consecutive_crashes = max_consecutive_crashes
+        self._consecutive_crashes = 0
+
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._broken = None
+        self.restarts = 0
+
+        self._wake_reader, self._wake_writer = self._context.Pipe(duplex=False)
+        self._workers = [ _WorkerProcess(self, i) for i in range(max_workers) ]
+
+        self._dispatcher = threading.Thread(target=self._dispatch,
+                                            name=f"{name_prefix}_dispatcher",
+                                            daemon=True)
+        self._dispatcher.start()
+
+    def submit(self,
+               type_name: str,
+               method_name: str,
+               payload=None,
+               *,
+               assembly_path: Optional[str] = None,
+               readback: bool = False) -> concurrent.futures.Future:
+        """
+        Call a .NET function with the default signature of
+        ``component_entry_point_fn`` in some worker process.
+
+        ``payload`` may be any object implementing the buffer protocol.
+        The future resolves to the function's return value, or if
+        ``readback`` is true, to a tuple of it and the payload's bytes
+        as left by .NET, for functions writing their results in place.
+        """
+        future = concurrent.futures.Future()
+        task = _Task(future, assembly_path, type_name, method_name, payload, readback)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new calls after shutdown")
+            if self._broken is not None:
+                raise self._broken
+            self._pending.append(task)
+        self._wake_writer.send_bytes(b'')
+        return future
+
+    def call(self, type_name: str, method_name: str, payload=None, **kwargs):
+        """
+        Like ``submit``, but wait for the result.
+        """
+        return self.submit(type_name, method_name, payload, **kwargs).result()
+
+    def _dispatch(self):
+        idle = collections.deque(self._workers)
+
+        while True:
+            by_conn = { worker.conn: worker for worker in self._workers if worker.alive }
+            ready = multiprocessing.connection.wait([ self._wake_reader, *by_conn ])
+
+            for conn in ready:
+                if conn is self._wake_reader:
+                    while self._wake_reader.poll():
+                        self._wake_reader.recv_bytes()
+                    continue
+
+                worker = by_conn[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    message = None
+
+                if message is None:
+                    if worker in idle:
+                        idle.remove(worker)
+                    replacement = self._replace_worker(worker)
+                    if replacement is not None:
+                        idle.append(replacement)
+                elif message[0] is None:
+                    error = message[2]
+                    if error is None:
+                        worker.ready = True
+                        continue
+
+                    # The worker could not start .NET; there is no point
+                    # in restarting it
+                    if worker.task is not None:
+                        worker.task.future.set_exception(error)
+                        worker.task = None
+                    if worker in idle:
+                        idle.remove(worker)
+                    self._fail(error)
+                else:
+                    self._complete(worker, message)
+                    idle.append(worker)
+
+            with self._lock:
+                while idle and self._pending:
+                    task = self._pending.popleft()
+                    if not task.future.set_running_or_notify_cancel():
+                        continue
+                    worker = idle.popleft()
+                    try:
+                        worker.send(task)
+                    except OSError as e:
+                        # The worker has exited; it is replaced once its
+                        # end of the pipe is seen to be closed
+                        worker.task = None
+                        task.future.set_exception(WorkerCrashedError(str(e)))
+                    except BaseException as e:
+                        worker.task = None
+                        task.future.set_exception(e)
+                        idle.appendleft(worker)
+
+                busy = any(worker.task is not None for worker in self._workers)
+                if not busy and (self._broken is not None or 
+                                 (self._shutdown and not self._pending)):
+                    break
+
+        for worker in self._workers:
+            if worker.alive:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+
+    def _complete(self, worker: _WorkerProcess, message):
+        task = worker.task
+        worker.task = None
+        worker.calls += 1
+        self._consecutive_crashes = 0
+        _, status, error = message
+        if error is not None:
+            task.future.set_exception(error)
+        elif task.readback:
+            task.future.set_result((status, bytes(worker.slot.buf[:worker.task_length])))
+        else:
+            task.future.set_result(status)
+
+    def _replace_worker(self, worker: _WorkerProcess) -> Optional[_WorkerProcess]:
+        task = worker.task
+        worker.task = None
+        worker.alive = False
+        worker.process.join()
+        worker.conn.close()
+        worker.release_slot()
+        message = f"Worker process {worker.process.name} exited with code {worker.process.exitcode}"
+        if task is not None:
+            task.future.set_exception(WorkerCrashedError(message))
+
+        with self._lock:
+            if self._shutdown or self._broken is not None:
+                return None
+            self._consecutive_crashes += 1
+            if not worker.ready:
+                # Starting .NET would most likely fail again in a new worker
+                error = WorkerCrashedError(message + " before starting .NET")
+            elif self._consecutive_crashes > self._max_consecutive_crashes:
+                error = WorkerCrashedError(
+                    f"Worker processes exited {self._consecutive_crashes} times "
+                    f"without completing a call; the last: {message}")
+            else:
+                error = None
+                self.restarts += 1
+
+        if error is not None:
+            self._fail(error)
+            return None
+
+        replacement = _WorkerProcess(self, worker.index)
+        self._workers[worker.index] = replacement
+        return replacement
+
+    def _fail(self, error: BaseException):
+        with self._lock:
+            if self._broken is None:
+                self._broken = error
+            pending = list(self._pending)
+            self._pending.clear()
+        for task in pending:
+            if task.future.set_running_or_notify_cancel():
+                task.future.set_exception(error)
+
+    @property
+    def max_workers(self) -> int:
+        return len(self._workers)
+
+    @property
+    def worker_pids(self) -> List[int]:
+        return [ worker.process.pid for worker in self._workers ]
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of submitted calls that are waiting for a worker process.
+        """
+        return len(self._pending)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """
+        Stop accepting calls, and stop the worker processes once
+        the calls already submitted have completed.
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                for task in self._pending:
+                    task.future.cancel()
+                self._pending.clear()
+        self._wake_writer.send_bytes(b'')
+
+        if wait:
+            self._dispatcher.join()
+            for worker in self._workers:
+                worker.process.join()
+                worker.alive = False
+                worker.conn.close()
+                worker.release_slot()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
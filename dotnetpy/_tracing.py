@@ -0,0 +1,259 @@
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from typing import List, NamedTuple
+
+from ._dotnetpy import ComponentEntryPoint, StartupProfile
+
+
+class CallRecord(NamedTuple):
+    """
+    One call into .NET recorded by ``CallTracer``.
+    """
+    target: str             # .NET type and method called
+    thread_id: int
+    start_ns: int           # time.perf_counter_ns() on entry
+    end_ns: int             # time.perf_counter_ns() on exit
+    status: object          # value returned, or None if the call raised an exception
+    stack: tuple            # (code object, line number) of calling Python frames, innermost first
+
+
+class TracedEntryPoint(ComponentEntryPoint):
+    """
+    ``ComponentEntryPoint`` that records its calls in ``CallTracer``.
+    It wraps another entry point, which may itself be instrumented.
+    """
+
+    def __init__(self, entry_point: ComponentEntryPoint, tracer: 'CallTracer'):
+        super().__init__(entry_point.function,
+                         entry_point.assembly_path,
+                         entry_point.type_name,
+                         entry_point.method_name)
+        self.inner = entry_point
+        self.tracer = tracer
+        self._target = f"{entry_point.type_name}::{entry_point.method_name}"
+
+    def __call__(self, arg=None) -> int:
+        tracer = self.tracer
+        if not tracer.enabled:
+            return self.inner(arg)
+
+        stack = tracer.capture_stack(sys._getframe(1))
+        status = None
+        start = time.perf_counter_ns()
+        try:
+            status = self.inner(arg)
+            return status
+        finally:
+            tracer.record(self._target, start, status, stack)
+
+    def __repr__(self):
+        return f"<TracedEntryPoint {self._target}>"
+
+
+class TracedFunction():
+    """
+    Wraps a ctypes function for a .NET method, as obtained from 
+    ``DotNetSession.bind`` or ``load_assembly_and_get_function_pointer``, 
+    to record its calls in ``CallTracer``.  It may wrap another wrapper,
+    such as ``InstrumentedFunction``.  The ctypes function itself is 
+    available as ``function``, to pass to native code.
+    """
+
+    def __init__(self, function, tracer: 'CallTracer', type_name: str, method_name: str):
+        self.inner = function
+        self.function = getattr(function, 'function', function)
+        self.tracer = tracer
+        self.type_name = type_name
+        self.method_name = method_name
+        self._target = f"{type_name}::{method_name}"
+
+    def __call__(self, *args):
+        tracer = self.tracer
+        if not tracer.enabled:
+            return self.inner(*args)
+
+        stack = tracer.capture_stack(sys._getframe(1))
+        result = None
+        start = time.perf_counter_ns()
+        try:
+            result = self.inner(*args)
+            return result
+        finally:
+            tracer.record(self._target, start, result, stack)
+
+    def __repr__(self):
+        return f"<TracedFunction {self._target}>"
+
+
+class CallTracer():
+    """
+    Records calls into .NET with the Python call stack that made them,
+    so time spent in .NET, which Python profilers only see as time in a
+    foreign function, can be attributed to the Python code responsible.
+
+    Pass an instance as the ``tracer`` argument of ``DotNetSession``
+    to trace calls through the entry points and functions it returns
+    from ``get_entry_point``, ``bind`` and, for component entry points, 
+    ``load_assembly_and_get_function_pointer``, as well as its 
+    ``call_batch``, ``call_async`` and ``stream``, and to include the
+    phases of its start-up.  Entry points obtained otherwise can be
+    wrapped with ``trace``.  Functions resolved with a delegate type 
+    but no signature are returned only as addresses, so calls to them 
+    cannot be traced.  Raw ctypes functions that were not resolved 
+    through the session are recorded under the name "?::?".
+
+    Calls are kept in a ring of ``capacity`` records, overwriting the
+    oldest.  Only the code object and line number of up to ``stack_depth``
+    frames are captured per call; they are formatted on export.
+    """
+
+    def __init__(self, capacity: int = 65536, stack_depth: int = 32):
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than 0")
+
+        self.capacity = capacity
+        self.stack_depth = stack_depth
+        self.enabled = True
+        self._ring = [ None ] * capacity
+        self._counter = itertools.count()
+        self._recorded = 0
+        self._startup_profiles = []
+
+    def trace(self, entry_point: ComponentEntryPoint) -> TracedEntryPoint:
+        if isinstance(entry_point, TracedEntryPoint) and entry_point.tracer is self:
+            return entry_point
+        return TracedEntryPoint(entry_point, self)
+
+    def trace_function(self, function, type_name: str, method_name: str) -> TracedFunction:
+        return TracedFunction(function, self, type_name, method_name)
+
+    def add_startup_profile(self, profile: StartupProfile, label: str = "DotNetSession"):
+        """
+        Include the phases of ``profile`` in exported traces,
+        including those measured after this call.
+        """
+        self._startup_profiles.append((label, profile))
+
+    def capture_stack(self, frame) -> tuple:
+        """
+        Summarize the Python stack from ``frame`` outwards, for ``record``.
+        """
+        stack = []
+        depth = self.stack_depth
+        while frame is not None and len(stack) < depth:
+            stack.append((frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        return tuple(stack)
+
+    def record(self, target: str, start_ns: int, status, stack: tuple):
+        """
+        Record a call into .NET on the current thread, that started
+        at ``start_ns`` and has just finished.
+        """
+        self._add(CallRecord(target,
+                             threading.get_ident(),
+                             start_ns,
+                             time.perf_counter_ns(),
+                             status,
+                             stack))
+
+    def _add(self, record: CallRecord):
+        # next() on itertools.count is atomic under the GIL
+        index = next(self._counter)
+        self._ring[index % self.capacity] = record
+        self._recorded = index + 1
+
+    @property
+    def dropped(self) -> int:
+        """
+        Number of records overwritten since the tracer was last cleared.
+        """
+        return max(0, self._recorded - self.capacity)
+
+    def clear(self):
+        self._ring = [ None ] * self.capacity
+        self._counter = itertools.count()
+        self._recorded = 0
+
+    def records(self) -> List[CallRecord]:
+        """
+        Recorded calls still in the ring, in order of entry.
+        """
+        return sorted((r for r in list(self._ring) if r is not None),
+                      key=lambda r: r.start_ns)
+
+    def _startup_phases(self):
+        for label, profile in self._startup_profiles:
+            for name, start, duration in list(profile.phases):
+                yield label, name, int(start * 1e9), int(duration * 1e9)
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Render the records, and the start-up phases of sessions, as
+        complete events in the Chrome trace event format, which can be
+        loaded into chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        events = []
+
+        for label, name, start_ns, duration_ns in self._startup_phases():
+            events.append({ "name": name,
+                            "cat": "startup",
+                            "ph": "X",
+                            "ts": start_ns / 1000,
+                            "dur": duration_ns / 1000,
+                            "pid": pid,
+                            "tid": 0,
+                            "args": { "session": label } })
+
+        for record in self.records():
+            events.append({ "name": record.target,
+                            "cat": "dotnet",
+                            "ph": "X",
+                            "ts": record.start_ns / 1000,
+                            "dur": (record.end_ns - record.start_ns) / 1000,
+                            "pid": pid,
+                            "tid": record.thread_id,
+                            "args": { "status": _to_json_value(record.status),
+                                      "python_stack": [ _format_frame(f) for f in record.stack ] } })
+
+        return { "traceEvents": events, "displayTimeUnit": "ns" }
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def to_collapsed_stacks(self) -> str:
+        """
+        Render the records as collapsed stacks, as taken by flamegraph.pl
+        and speedscope: one line per distinct stack, outermost frame first,
+        ending with the .NET target, weighted by microseconds spent in .NET.
+        Start-up phases appear as stacks of their own.
+        """
+        weights = {}
+        for label, name, _, duration_ns in self._startup_phases():
+            key = f"{label} start-up;{name}"
+            weights[key] = weights.get(key, 0) + duration_ns
+
+        for record in self.records():
+            frames = [ _format_frame(f) for f in reversed(record.stack) ]
+            frames.append(f"[.NET] {record.target}")
+            key = ";".join(frames)
+            weights[key] = weights.get(key, 0) + record.end_ns - record.start_ns
+
+        return "".join(f"{key} {max(1, round(weight / 1000))}\n"
+                       for key, weight in weights.items())
+
+
+def _to_json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+def _format_frame(frame: tuple) -> str:
+    code, lineno = frame
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})".replace(';', ':')
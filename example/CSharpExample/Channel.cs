@@ -0,0 +1,219 @@
+﻿using System;
+using System.Runtime.InteropServices;
+using System.Threading;
+
+namespace CSharpExample
+{
+    /// <summary>
+    /// One ring buffer of a DotNetChannel, as laid out by dotnetpy.
+    /// </summary>
+    internal readonly unsafe struct ChannelRing
+    {
+        private const int HeadOffset = 64;
+        private const int TailOffset = 128;
+        private const int WaitingOffset = 192;
+        private const int ClosedOffset = 196;
+        private const int HeaderSize = 256;
+        private const uint WrapMarker = 0xFFFFFFFF;
+
+        private readonly byte* _header;
+        private readonly byte* _data;
+        private readonly long _capacity;
+
+        public ChannelRing(IntPtr header)
+        {
+            _header = (byte*)header;
+            _data = _header + HeaderSize;
+            _capacity = *(long*)_header;
+        }
+
+        private ref long Head => ref *(long*)(_header + HeadOffset);
+        private ref long Tail => ref *(long*)(_header + TailOffset);
+        private ref int Waiting => ref *(int*)(_header + WaitingOffset);
+        private ref int Closed => ref *(int*)(_header + ClosedOffset);
+
+        public bool IsEmpty => Volatile.Read(ref Head) == Volatile.Read(ref Tail);
+
+        public bool IsClosed => Volatile.Read(ref Closed) != 0;
+
+        public void Close() => Volatile.Write(ref Closed, 1);
+
+        public bool IsConsumerWaiting => Volatile.Read(ref Waiting) != 0;
+
+        /// <summary>
+        /// Sets the flag for the consumer waiting, with a full fence
+        /// so that the ring is re-checked only after the flag is visible.
+        /// </summary>
+        public void SetConsumerWaiting(bool waiting) 
+            => Interlocked.Exchange(ref Waiting, waiting ? 1 : 0);
+
+        /// <summary>
+        /// Gets the next record in place, without consuming it.
+        /// </summary>
+        public bool TryPeek(out byte* payload, out int length, out long nextTail)
+        {
+            long tail = Tail;
+            if (tail == Volatile.Read(ref Head))
+            {
+                payload = null;
+                length = 0;
+                nextTail = tail;
+                return false;
+            }
+
+            long position = tail & (_capacity - 1);
+            uint prefix = *(uint*)(_data + position);
+            if (prefix == WrapMarker)
+            {
+                tail += _capacity - position;
+                position = 0;
+                prefix = *(uint*)_data;
+            }
+
+            payload = _data + position + 4;
+            length = (int)prefix;
+            nextTail = tail + ((4 + length + 7) & ~7);
+            return true;
+        }
+
+        public void Consume(long nextTail) => Volatile.Write(ref Tail, nextTail);
+
+        public bool TryWrite(byte* payload, int length)
+        {
+            long recordSize = (4 + length + 7) & ~7;
+            long head = Head;
+            long position = head & (_capacity - 1);
+            long contiguous = _capacity - position;
+            long needed = recordSize <= contiguous ? recordSize : contiguous + recordSize;
+            if (_capacity - (head - Volatile.Read(ref Tail)) < needed)
+                return false;
+
+            if (recordSize > contiguous)
+            {
+                *(uint*)(_data + position) = WrapMarker;
+                head += contiguous;
+                position = 0;
+            }
+
+            *(uint*)(_data + position) = (uint)length;
+            Buffer.MemoryCopy(payload, _data + position + 4, length, length);
+            Volatile.Write(ref Head, head + recordSize);
+            return true;
+        }
+    }
+
+    /// <summary>
+    /// Component that echoes every message sent through a DotNetChannel
+    /// back to Python, on a dedicated thread.
+    /// </summary>
+    public static unsafe class ChannelEcho
+    {
+        [StructLayout(LayoutKind.Sequential)]
+        private struct ChannelDescriptor
+        {
+            public IntPtr Outbound;
+            public IntPtr Inbound;
+            public int OutboundWaitFd;
+            public int InboundNotifyFd;
+        }
+
+        [StructLayout(LayoutKind.Sequential)]
+        private struct PollFd
+        {
+            public int Fd;
+            public short Events;
+            public short Revents;
+        }
+
+        private const short POLLIN = 1;
+
+        [DllImport("libc", SetLastError = true)]
+        private static extern int poll(PollFd* fds, UIntPtr nfds, int timeout);
+
+        [DllImport("libc", SetLastError = true)]
+        private static extern IntPtr read(int fd, void* buf, UIntPtr count);
+
+        [DllImport("libc", SetLastError = true)]
+        private static extern IntPtr write(int fd, void* buf, UIntPtr count);
+
+        /// <summary>
+        /// Entry point for DotNetChannel.connect.
+        /// </summary>
+        public static int Start(IntPtr argPtr, int argSize)
+        {
+            if (argSize < sizeof(ChannelDescriptor))
+                return -1;
+
+            var descriptor = *(ChannelDescriptor*)argPtr;
+            var thread = new Thread(() => Run(descriptor))
+            {
+                IsBackground = true,
+                Name = "ChannelEcho"
+            };
+            thread.Start();
+            return 0;
+        }
+
+        private static void Wait(int fd, int timeoutMilliseconds)
+        {
+            if (fd < 0)
+            {
+                Thread.Sleep(0);
+                return;
+            }
+
+            var pollFd = new PollFd { Fd = fd, Events = POLLIN };
+            poll(&pollFd, (UIntPtr)1, timeoutMilliseconds);
+
+            ulong counter;
+            read(fd, &counter, (UIntPtr)sizeof(ulong));
+        }
+
+        private static void Notify(int fd)
+        {
+            if (fd < 0)
+                return;
+
+            ulong one = 1;
+            write(fd, &one, (UIntPtr)sizeof(ulong));
+        }
+
+        private static void Run(ChannelDescriptor descriptor)
+        {
+            var outbound = new ChannelRing(descriptor.Outbound);
+            var inbound = new ChannelRing(descriptor.Inbound);
+            var spinner = new SpinWait();
+
+            while (true)
+            {
+                if (outbound.TryPeek(out byte* payload, out int length, out long nextTail))
+                {
+                    while (!inbound.TryWrite(payload, length))
+                        spinner.SpinOnce();
+                    spinner.Reset();
+
+                    outbound.Consume(nextTail);
+
+                    if (inbound.IsConsumerWaiting)
+                        Notify(descriptor.InboundNotifyFd);
+                    continue;
+                }
+
+                if (outbound.IsClosed)
+                {
+                    if (outbound.IsEmpty)
+                        break;
+                    continue;
+                }
+
+                outbound.SetConsumerWaiting(true);
+                if (outbound.IsEmpty && !outbound.IsClosed)
+                    Wait(descriptor.OutboundWaitFd, 10);
+                outbound.SetConsumerWaiting(false);
+            }
+
+            inbound.Close();
+            Notify(descriptor.InboundNotifyFd);
+        }
+    }
+}
@@ -1,5 +1,7 @@
 ﻿using System;
+using System.Runtime.InteropServices;
 using System.Text;
+using System.Threading;
 
 namespace CSharpExample
 {
@@ -11,5 +13,206 @@ namespace CSharpExample
             Console.WriteLine($"Hello world! 世界に挨拶します　argPtr={argPtr} argSize={argSize}");
             return 0;
         }
+
+        /// <summary>
+        /// Does nothing; called to attach threads to the .NET run-time ahead of time.
+        /// </summary>
+        public static int Noop(IntPtr argPtr, int argSize) => 0;
+
+        /// <summary>
+        /// Stand-in for real work on one message: returns the sum of its bytes.
+        /// </summary>
+        public static unsafe int ProcessMessage(IntPtr argPtr, int argSize)
+        {
+            var bytes = new ReadOnlySpan<byte>((void*)argPtr, argSize);
+            int sum = 0;
+            foreach (byte b in bytes)
+                sum += b;
+            return sum;
+        }
+
+        /// <summary>
+        /// Layout of the argument passed by DotNetSession.call_batch.
+        /// </summary>
+        [StructLayout(LayoutKind.Sequential)]
+        private struct BatchDescriptor
+        {
+            public int Count;
+            public int Reserved;
+            public IntPtr Arena;
+            public IntPtr Items;
+            public IntPtr Statuses;
+        }
+
+        /// <summary>
+        /// Batch-aware counterpart to <see cref="ProcessMessage" />,
+        /// processing all payloads packed by DotNetSession.call_batch.
+        /// </summary>
+        public static unsafe int ProcessBatch(IntPtr argPtr, int argSize)
+        {
+            if (argSize < sizeof(BatchDescriptor))
+                return -1;
+
+            ref var batch = ref *(BatchDescriptor*)argPtr;
+            var arena = (byte*)batch.Arena;
+            var items = (long*)batch.Items;
+            var statuses = (int*)batch.Statuses;
+
+            for (int i = 0; i < batch.Count; ++i)
+            {
+                long offset = items[2 * i];
+                long length = items[2 * i + 1];
+                statuses[i] = ProcessMessage((IntPtr)(arena + offset), (int)length);
+            }
+
+            return batch.Count;
+        }
+
+        /// <summary>
+        /// Layout of the argument passed by DotNetSession.call_async.
+        /// </summary>
+        [StructLayout(LayoutKind.Sequential)]
+        private struct AsyncCallDescriptor
+        {
+            public IntPtr Completion;
+            public IntPtr Token;
+            public IntPtr Arg;
+            public int ArgSize;
+        }
+
+        [UnmanagedFunctionPointer(CallingConvention.Winapi)]
+        private delegate void AsyncCompletion(IntPtr token, int status);
+
+        /// <summary>
+        /// Asynchronous counterpart to <see cref="ProcessMessage" />,
+        /// doing its work on the .NET thread pool and reporting the 
+        /// result to DotNetSession.call_async through the completion callback.
+        /// </summary>
+        public static unsafe int ProcessMessageAsync(IntPtr argPtr, int argSize)
+        {
+            if (argSize < sizeof(AsyncCallDescriptor))
+                return -1;
+
+            var call = *(AsyncCallDescriptor*)argPtr;
+            var completion = Marshal.GetDelegateForFunctionPointer<AsyncCompletion>(call.Completion);
+
+            ThreadPool.UnsafeQueueUserWorkItem(_ =>
+            {
+                int status = ProcessMessage(call.Arg, call.ArgSize);
+                completion(call.Token, status);
+            }, null);
+
+            return 0;
+        }
+
+        /// <summary>
+        /// Layout of the argument passed by DotNetSession.stream.
+        /// </summary>
+        [StructLayout(LayoutKind.Sequential)]
+        private struct StreamDescriptor
+        {
+            public IntPtr Emit;
+            public IntPtr Request;
+            public IntPtr Chunks;
+            public int RequestSize;
+            public int ChunkSize;
+            public int ChunkCount;
+        }
+
+        [UnmanagedFunctionPointer(CallingConvention.Winapi)]
+        private delegate int StreamEmit(int chunkIndex, int length);
+
+        /// <summary>
+        /// Streams back the number of bytes requested as a 64-bit integer, 
+        /// each byte being its position modulo 251, through DotNetSession.stream.
+        /// </summary>
+        public static unsafe int StreamBytes(IntPtr argPtr, int argSize)
+        {
+            if (argSize < sizeof(StreamDescriptor))
+                return -1;
+
+            ref var stream = ref *(StreamDescriptor*)argPtr;
+            if (stream.RequestSize < sizeof(long))
+                return -1;
+
+            var emit = Marshal.GetDelegateForFunctionPointer<StreamEmit>(stream.Emit);
+            var chunks = (byte**)stream.Chunks;
+            long total = *(long*)stream.Request;
+            long position = 0;
+            int chunkIndex = 0;
+
+            while (position < total)
+            {
+                var chunk = new Span<byte>(chunks[chunkIndex], stream.ChunkSize);
+                int length = (int)Math.Min(stream.ChunkSize, total - position);
+                for (int i = 0; i < length; ++i)
+                    chunk[i] = (byte)((position + i) % 251);
+                position += length;
+
+                chunkIndex = emit(chunkIndex, length);
+                if (chunkIndex < 0)
+                    return 1;
+            }
+
+            return 0;
+        }
+
+        /// <summary>
+        /// Event passed in batches to a callback registered through
+        /// CallbackRegistry.register_batched.
+        /// </summary>
+        [StructLayout(LayoutKind.Sequential)]
+        private struct SampleEvent
+        {
+            public long Sequence;
+            public double Value;
+        }
+
+        [UnmanagedFunctionPointer(CallingConvention.Winapi)]
+        private unsafe delegate int EventBatchCallback(SampleEvent* events, int count);
+
+        [StructLayout(LayoutKind.Sequential)]
+        private struct RaiseEventsDescriptor
+        {
+            public IntPtr Callback;
+            public int Count;
+            public int BatchSize;
+        }
+
+        /// <summary>
+        /// Raises the requested number of events through a batched callback,
+        /// stopping early if the callback reports an error.
+        /// </summary>
+        public static unsafe int RaiseEvents(IntPtr argPtr, int argSize)
+        {
+            if (argSize < sizeof(RaiseEventsDescriptor))
+                return -1;
+
+            ref var request = ref *(RaiseEventsDescriptor*)argPtr;
+            if (request.BatchSize <= 0)
+                return -1;
+
+            var callback = Marshal.GetDelegateForFunctionPointer<EventBatchCallback>(request.Callback);
+            var batch = new SampleEvent[request.BatchSize];
+
+            fixed (SampleEvent* events = batch)
+            {
+                for (int start = 0; start < request.Count; start += batch.Length)
+                {
+                    int count = Math.Min(batch.Length, request.Count - start);
+                    for (int i = 0; i < count; ++i)
+                    {
+                        events[i].Sequence = start + i;
+                        events[i].Value = (start + i) * 0.5;
+                    }
+
+                    int status = callback(events, count);
+                    if (status < 0)
+                        return status;
+                }
+            }
+
+            return 0;
+        }
     }
 }
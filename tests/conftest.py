@@ -0,0 +1,32 @@
+import os.path
+import sys
+
+import pytest
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(this_dir)
+sys.path.insert(0, root_dir)
+sys.path.insert(0, os.path.join(root_dir, "benchmarks"))
+
+from dotnetpy import DotNetSession
+
+
+@pytest.fixture(scope="session")
+def stub_library(tmp_path_factory) -> str:
+    """
+    Path to the stand-in for hostfxr from the benchmarks, compiled
+    once per test run, so that the tests need no .NET installation.
+    """
+    from overhead import build_stub
+    try:
+        return build_stub(str(tmp_path_factory.mktemp("stub")))
+    except (NotImplementedError, RuntimeError) as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture
+def session(stub_library, request) -> DotNetSession:
+    # The stub ignores the configuration file, but each test gets
+    # its own path so that it does not share a host context
+    return DotNetSession(dll_path=stub_library,
+                         config_path=f"{request.node.name}.json")
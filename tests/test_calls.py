@@ -0,0 +1,151 @@
+import ctypes
+import struct
+import threading
+
+import pytest
+
+from dotnetpy import (BufferPool, DotNetHostError, EntryPointCache,
+                      batch_descriptor, component_entry_point_fn)
+
+STUB_ASSEMBLY = "/stub/Stub.dll"
+STUB_TYPE = "Stub.Functions, Stub"
+
+
+def test_entry_point_cache_evicts_least_recently_used():
+    cache = EntryPointCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_entry_point_cache_invalidate():
+    cache = EntryPointCache(None)
+    for i in range(1000):
+        cache.put(i, i)
+    assert len(cache) == 1000
+
+    cache.invalidate(5)
+    assert cache.get(5) is None
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_entry_point_cache_disabled():
+    cache = EntryPointCache(0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    with pytest.raises(ValueError):
+        EntryPointCache(-1)
+
+
+def test_session_caches_entry_points(session):
+    cache = session.entry_point_cache
+    first = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "Noop")
+    second = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "Noop")
+    assert first.function is second.function
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first(b"payload") == 0
+
+
+def test_call_batch_layout(session):
+    payloads = [ b"a", b"", b"hello", bytearray(b"xyz" * 100) ]
+    seen = []
+
+    def process_batch(arg, size):
+        assert size == ctypes.sizeof(batch_descriptor)
+        batch = batch_descriptor.from_address(arg)
+        assert batch.arena % 8 == 0
+        items = (ctypes.c_int64 * (2 * batch.count)).from_address(batch.items)
+        statuses = (ctypes.c_int32 * batch.count).from_address(batch.statuses)
+        for i in range(batch.count):
+            offset, length = items[2*i], items[2*i+1]
+            seen.append(ctypes.string_at(batch.arena + offset, length))
+            statuses[i] = length + 1
+        return batch.count
+
+    function = component_entry_point_fn(process_batch)
+    statuses = session.call_batch(function, payloads)
+    assert seen == [ bytes(p) for p in payloads ]
+    assert list(statuses) == [ len(p) + 1 for p in payloads ]
+    assert session.buffer_pool.stats.in_use_bytes == 0
+
+
+def test_call_batch_through_stub(session):
+    entry_point = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "ProcessBatch")
+    assert list(session.call_batch(entry_point, [ b"x" ] * 10)) == [ 0 ] * 10
+    assert len(session.call_batch(entry_point, [])) == 0
+
+
+def test_call_batch_failure(session):
+    function = component_entry_point_fn(lambda arg, size: -5)
+    with pytest.raises(DotNetHostError) as e:
+        session.call_batch(function, [ b"x" ])
+    assert e.value.error_code == -5
+
+
+def stream_request(total: int) -> bytes:
+    return struct.pack('<q', total)
+
+
+def expected_stream(total: int) -> bytes:
+    return bytes(i % 251 for i in range(total))
+
+
+def stream_threads() -> list:
+    return [ t for t in threading.enumerate() if t.name == "DotNetSession.stream" ]
+
+
+def test_stream(session):
+    entry_point = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "StreamBytes")
+    total = 10000
+    data = b"".join(bytes(chunk)
+                    for chunk in session.stream(entry_point, stream_request(total),
+                                                chunk_size=1024, chunk_count=3))
+    assert data == expected_stream(total)
+
+
+def test_stream_early_close(session):
+    entry_point = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "StreamBytes")
+    stream = session.stream(entry_point, stream_request(1 << 30),
+                            chunk_size=4096, chunk_count=2)
+    received = b""
+    for chunk in stream:
+        received += bytes(chunk)
+        if len(received) >= 3 * 4096:
+            break
+
+    stream.close()
+    assert received == expected_stream(len(received))
+    assert not stream_threads()
+
+
+def test_stream_failure(session):
+    entry_point = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "StreamBytes")
+    with pytest.raises(DotNetHostError):
+        list(session.stream(entry_point, b"short"))
+
+
+def test_stream_validates_eagerly(session):
+    entry_point = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "StreamBytes")
+    with pytest.raises(ValueError):
+        session.stream(entry_point, chunk_count=0)
+    assert not stream_threads()
+
+
+def test_released_pooled_buffer_is_rejected(session):
+    entry_point = session.get_entry_point(STUB_ASSEMBLY, STUB_TYPE, "Noop")
+    pool = BufferPool()
+    buffer = pool.acquire(100)
+    assert entry_point(buffer) == 0
+    buffer.release()
+    with pytest.raises(ValueError):
+        entry_point(buffer)
+    with pytest.raises(ValueError):
+        buffer.view
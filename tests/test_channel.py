@@ -0,0 +1,90 @@
+import collections
+import mmap
+import random
+
+from dotnetpy._channel import _RING_HEADER_SIZE, _Ring
+
+
+def make_ring(capacity: int) -> _Ring:
+    region = mmap.mmap(-1, _RING_HEADER_SIZE + capacity)
+    return _Ring(region, 0, capacity)
+
+
+def test_ring_round_trip():
+    ring = make_ring(256)
+    assert ring.is_empty
+    assert ring.try_read() is None
+
+    assert ring.try_write(memoryview(b"hello"))
+    assert ring.try_write(memoryview(b""))
+    assert not ring.is_empty
+    assert ring.try_read() == b"hello"
+    assert ring.try_read() == b""
+    assert ring.try_read() is None
+    ring.release()
+
+
+def test_ring_full():
+    ring = make_ring(64)
+    # Each record of 20 bytes takes 24 bytes with its length prefix and padding
+    assert ring.try_write(memoryview(b"a" * 20))
+    assert ring.try_write(memoryview(b"b" * 20))
+    assert not ring.try_write(memoryview(b"c" * 20))
+
+    assert ring.try_read() == b"a" * 20
+    assert ring.try_write(memoryview(b"c" * 20))
+    assert ring.try_read() == b"b" * 20
+    assert ring.try_read() == b"c" * 20
+    ring.release()
+
+
+def test_ring_wraparound():
+    ring = make_ring(64)
+    # Fill to 48 bytes, leaving 16 contiguous bytes at the end
+    assert ring.try_write(memoryview(b"x" * 20))
+    assert ring.try_write(memoryview(b"y" * 20))
+    assert ring.try_read() == b"x" * 20
+    assert ring.try_read() == b"y" * 20
+
+    # Does not fit in the 16 bytes left, so it wraps to the start
+    assert ring.try_write(memoryview(b"z" * 20))
+    assert ring.try_read() == b"z" * 20
+    assert ring.is_empty
+    ring.release()
+
+
+def test_ring_matches_queue():
+    rng = random.Random(12345)
+    ring = make_ring(512)
+    expected = collections.deque()
+
+    for i in range(20000):
+        if rng.random() < 0.55:
+            payload = bytes([i % 256]) * rng.randint(0, ring.max_record_size)
+            if ring.try_write(memoryview(payload)):
+                expected.append(payload)
+            else:
+                assert expected
+        else:
+            payload = ring.try_read()
+            if expected:
+                assert payload == expected.popleft()
+            else:
+                assert payload is None
+
+    while expected:
+        assert ring.try_read() == expected.popleft()
+    assert ring.try_read() is None
+    ring.release()
+
+
+def test_ring_max_record_size_always_fits_when_empty():
+    ring = make_ring(128)
+    payload = memoryview(b"m" * ring.max_record_size)
+    for _ in range(50):
+        # Advance the position by a varying amount before each large record
+        assert ring.try_write(memoryview(b"s"))
+        assert ring.try_read() == b"s"
+        assert ring.try_write(payload)
+        assert ring.try_read() == bytes(payload)
+    ring.release()
@@ -0,0 +1,86 @@
+import gc
+
+from dotnetpy import DotNetSession, StartupProfile, StatusCode
+from dotnetpy._dotnetpy import _g_host_contexts
+
+
+def test_sessions_share_host_context(stub_library):
+    first = DotNetSession(dll_path=stub_library, config_path="shared.json")
+    second = DotNetSession(dll_path=stub_library, config_path="shared.json")
+    context = first.host_context
+    assert second.host_context is context
+    assert context._ref_count == 2
+
+    del first
+    gc.collect()
+    assert context._ref_count == 1
+    assert context.handle is not None
+
+    del second
+    gc.collect()
+    assert context.handle is None
+    assert context.key not in _g_host_contexts._contexts
+
+
+def test_secondary_context_reports_property_conflicts(stub_library):
+    primary = DotNetSession(dll_path=stub_library,
+                            config_path="primary.json",
+                            config_overrides={ "Test.Conflict": "1" })
+    secondary = DotNetSession(dll_path=stub_library,
+                              config_path="secondary.json",
+                              config_overrides={ "Test.Conflict": "2" })
+    assert primary.host_context.is_primary
+    assert secondary.host_context.status == StatusCode.Success_HostAlreadyInitialized
+    assert secondary.property_conflicts == { "Test.Conflict": ("2", "1") }
+
+    del secondary, primary
+    gc.collect()
+
+
+def test_config_overrides_are_converted(stub_library):
+    overridden = DotNetSession(dll_path=stub_library,
+                               config_path="overrides.json",
+                               config_overrides={ "Test.Flag": True, "Test.Number": 3 })
+    properties = overridden.runtime_properties
+    if overridden.host_context.is_primary:
+        assert properties["Test.Flag"] == "true"
+        assert properties["Test.Number"] == "3"
+    else:
+        assert overridden.property_conflicts["Test.Flag"][0] == "true"
+
+
+def test_property_snapshot_is_cached_until_set(session):
+    snapshot = session.runtime_properties
+    assert session.runtime_properties is snapshot
+
+    session.set_runtime_property_value("Test.Key", "value")
+    updated = session.runtime_properties
+    assert updated is not snapshot
+    assert updated["Test.Key"] == "value"
+    assert session.get_runtime_property_value("Test.Key") == "value"
+
+    session.set_runtime_properties({ "Test.A": False, "Test.B": 7, "Test.Key": None })
+    updated = session.runtime_properties
+    assert updated["Test.A"] == "false"
+    assert updated["Test.B"] == "7"
+    assert "Test.Key" not in updated
+
+
+def test_no_properties(session):
+    session.set_runtime_properties({ key: None for key in session.runtime_properties })
+    assert session.runtime_properties == {}
+    assert session.get_runtime_properties() == []
+
+
+def test_startup_callback_errors_are_ignored(stub_library):
+    phases = []
+
+    def callback(name, duration):
+        phases.append(name)
+        raise RuntimeError("metrics unavailable")
+
+    session = DotNetSession(dll_path=stub_library,
+                            config_path="callback.json",
+                            startup_callback=callback)
+    assert StartupProfile.INITIALIZE_FOR_RUNTIME_CONFIG in phases
+    assert session.host_context.handle is not None
@@ -0,0 +1,66 @@
+import sys
+
+import pytest
+
+from dotnetpy import DotNetProcessPool, WorkerCrashedError
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 8),
+                                reason="DotNetProcessPool needs Python 3.8")
+
+STUB_ASSEMBLY = "/stub/Stub.dll"
+STUB_TYPE = "Stub.Functions, Stub"
+
+
+def test_calls(stub_library):
+    with DotNetProcessPool(2, STUB_ASSEMBLY, dll_path=stub_library) as pool:
+        futures = [ pool.submit(STUB_TYPE, "Noop", b"x" * i) for i in range(50) ]
+        assert [ f.result(timeout=60) for f in futures ] == [ 0 ] * 50
+        assert pool.call(STUB_TYPE, "Noop", bytearray(b"abc"), readback=True) == (0, b"abc")
+        assert pool.restarts == 0
+
+
+def test_crashed_worker_is_restarted(stub_library):
+    with DotNetProcessPool(1, STUB_ASSEMBLY, dll_path=stub_library) as pool:
+        assert pool.call(STUB_TYPE, "Noop") == 0
+        pid = pool.worker_pids[0]
+
+        # The stub's "Exit" exits with argSize as the code
+        with pytest.raises(WorkerCrashedError):
+            pool.call(STUB_TYPE, "Exit", b"abc")
+
+        assert pool.call(STUB_TYPE, "Noop") == 0
+        assert pool.restarts == 1
+        assert pool.worker_pids[0] != pid
+
+
+def test_repeated_crashes_break_pool(stub_library):
+    with DotNetProcessPool(1, STUB_ASSEMBLY, dll_path=stub_library,
+                           max_consecutive_crashes=1) as pool:
+        with pytest.raises(WorkerCrashedError):
+            pool.call(STUB_TYPE, "Exit", b"a")
+        assert pool.restarts == 1
+
+        with pytest.raises(WorkerCrashedError):
+            pool.call(STUB_TYPE, "Exit", b"a")
+        with pytest.raises(WorkerCrashedError):
+            pool.submit(STUB_TYPE, "Noop")
+        assert pool.restarts == 1
+
+
+def test_worker_crashing_on_start_is_not_restarted(stub_library):
+    # Warming up the manifest entry makes the worker exit before it is ready
+    manifest = { "assembly": STUB_ASSEMBLY,
+                 "entry_points": [ { "type": STUB_TYPE, "method": "Exit", "warm_up": "abc" } ] }
+    with DotNetProcessPool(1, STUB_ASSEMBLY, dll_path=stub_library,
+                           session_kwargs={ "manifest": manifest }) as pool:
+        with pytest.raises(WorkerCrashedError):
+            pool.call(STUB_TYPE, "Noop")
+        with pytest.raises(WorkerCrashedError):
+            pool.submit(STUB_TYPE, "Noop")
+        assert pool.restarts == 0
+
+
+def test_worker_failing_to_start(tmp_path):
+    with DotNetProcessPool(1, STUB_ASSEMBLY, dll_path=str(tmp_path / "missing.so")) as pool:
+        with pytest.raises(OSError):
+            pool.call(STUB_TYPE, "Noop")